@@ -0,0 +1,238 @@
+"""
+End-to-end benchmark of the search pipeline against fake_upstream.py.
+
+Points every upstream URL and API key in main.py at a local fake server and
+drives fetch_popular_roblox_games_smart, search_youtube_script_all and the
+findscripts command. Reports p50/p95 latency per call, upstream requests per
+call (by route) and peak Python heap (tracemalloc, measured in a separate pass
+so it doesn't skew the timings).
+
+Runs are cold by default: game caches, the game index, circuit breakers and
+the result cache are reset before every iteration. --warm keeps them.
+
+--workers N runs video searches in N search worker processes (SEARCH_WORKERS
+mode) instead of in the benchmark process. Cold runs still clear the shared
+result cache and quota file, but not the workers' own breakers and rate
+limiters.
+
+Usage:
+  python bench_pipeline.py [--scenario games|videos|findscripts|all]
+                           [--iterations N] [--concurrency C] [--warm] [--workers N]
+                           [--latency S] [--jitter S] [--failure-rate F] [--throttle-rate F]
+                           [--route-latency ROUTE=SECONDS ...] [--fixtures DIR]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import main
+from fake_upstream import FakeUpstream
+
+SEARCHES = ["blox", "simulator", "tower defense", "garden", "hood", "obby", "mystery", "pet"]
+VIDEO_GAMES = ["Blox Fruits", "Grow a Garden", "Da Hood", "Doors", "Arsenal", "Pet Simulator 99",
+               "Murder Mystery 2", "Bee Swarm Simulator"]
+
+
+# Seconds from findscripts start until its message first showed a video
+first_video_latencies = []
+
+
+class FakeMessage:
+    def __init__(self, started):
+        self.started = started
+        self.edits = 0
+        self.first_video = None
+
+    async def edit(self, embed=None, **kwargs):
+        self.edits += 1
+        if self.first_video is None and embed is not None and any("▶️" in f.value for f in embed.fields):
+            self.first_video = time.perf_counter() - self.started
+            first_video_latencies.append(self.first_video)
+
+
+class FakeContext:
+    # Just enough of commands.Context for findscripts
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        msg = FakeMessage(self.started)
+        self.messages.append(msg)
+        return msg
+
+
+def configure(upstream, base, cache_dir, workers):
+    settings = upstream.settings(base)
+    for name in ("YOUTUBE_API_KEY", "SEARCHAPI_IO_KEY", "SERPAPI_KEY", "CAMIDEO_KEY"):
+        settings[name] = "bench"
+    for name, value in settings.items():
+        setattr(main, name, value)
+    main.PREFETCH_TOP_GAMES = 0
+    paths = {
+        "RESULT_CACHE_PATH": os.path.join(cache_dir, "results.sqlite3"),
+        "QUOTA_STATE_PATH": os.path.join(cache_dir, "quota.json"),
+        "JOB_QUEUE_PATH": os.path.join(cache_dir, "jobs.sqlite3"),
+    }
+    main.quota_store.path = paths["QUOTA_STATE_PATH"]
+    main.result_cache.close()
+    main.result_cache = main.ResultCache(main.SQLiteCacheBackend(
+        paths["RESULT_CACHE_PATH"], main.RESULT_CACHE_TTL, main.RESULT_CACHE_MAX_ENTRIES))
+    if not workers:
+        return []
+    # Worker processes read their settings from the environment
+    os.environ.update(settings, **paths, SEARCH_WORKERS=str(workers))
+    main.SEARCH_WORKERS = workers
+    main.job_queue = main.JobQueue(paths["JOB_QUEUE_PATH"], main.JOB_TIMEOUT)
+    return main.start_search_workers(workers)
+
+
+def reset_caches():
+    main.game_list_cache.clear()
+    main.game_index = None
+    main.circuit_breakers.clear()
+    main.rate_limiters.clear()
+    main.quota_store.state = {}
+    main.quota_store.pending = {}
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(main.quota_store.path)
+    main.result_cache.clear()
+
+
+def scenario_calls(scenario, concurrency, iteration):
+    # One coroutine factory per concurrent caller; inputs differ so callers
+    # aren't coalesced by single_flight_stream
+    calls = []
+    for i in range(concurrency):
+        n = iteration * concurrency + i
+        if scenario == "games":
+            search = SEARCHES[n % len(SEARCHES)]
+            calls.append(lambda s=search: main.fetch_popular_roblox_games_smart(s, 10))
+        elif scenario == "videos":
+            game = VIDEO_GAMES[n % len(VIDEO_GAMES)]
+            calls.append(lambda g=game: main.search_youtube_script_all(f"{g} script", 1))
+        else:
+            search = SEARCHES[n % len(SEARCHES)]
+            calls.append(lambda s=search: main.findscripts.callback(FakeContext(), search=s, max_games=5, max_videos=1))
+    return calls
+
+
+async def timed(call):
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+async def run_scenario(scenario, args, upstream):
+    latencies = []
+    first_video_latencies.clear()
+    before = Counter(upstream.requests)
+    if args.warm:
+        # One untimed pass over the same inputs to fill the caches, then
+        # build the index like the background loop would
+        for iteration in range(args.iterations):
+            await asyncio.gather(*(timed(c) for c in scenario_calls(scenario, args.concurrency, iteration)))
+        main.rebuild_game_index()
+        before = Counter(upstream.requests)
+        first_video_latencies.clear()
+    for iteration in range(args.iterations):
+        if not args.warm:
+            reset_caches()
+        calls = scenario_calls(scenario, args.concurrency, iteration)
+        latencies.extend(await asyncio.gather(*(timed(c) for c in calls)))
+    requests = Counter(upstream.requests)
+    requests.subtract(before)
+    first_videos = list(first_video_latencies)
+
+    # Memory pass: same workload once more under tracemalloc
+    if not args.warm:
+        reset_caches()
+    tracemalloc.start()
+    await asyncio.gather(*(timed(c) for c in scenario_calls(scenario, args.concurrency, args.iterations)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, first_videos, requests, peak
+
+
+def quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(scenario, latencies, first_videos, requests, peak):
+    calls = len(latencies)
+    total = sum(requests.values())
+    print(f"== {scenario} ({calls} calls)")
+    print(f"  latency p50:  {quantile(latencies, 0.5) * 1000:9.1f} ms")
+    print(f"  latency p95:  {quantile(latencies, 0.95) * 1000:9.1f} ms")
+    if first_videos:
+        # Time until the Discord message first showed a video link
+        print(f"  first video p50: {quantile(first_videos, 0.5) * 1000:6.1f} ms")
+        print(f"  first video p95: {quantile(first_videos, 0.95) * 1000:6.1f} ms")
+    print(f"  requests:     {total / calls:9.1f} per call ({total} total)")
+    for route, count in sorted(requests.items(), key=lambda r: -r[1]):
+        if count:
+            print(f"    {route:20s} {count / calls:7.1f}")
+    print(f"  peak heap:    {peak / 1024 / 1024:9.1f} MiB")
+
+
+def parse_route_config(values, key):
+    config = {}
+    for item in values or []:
+        route, _, value = item.partition("=")
+        config[route] = {key: float(value)}
+    return config
+
+
+async def run(args):
+    route_config = parse_route_config(args.route_latency, "latency")
+    for route, config in parse_route_config(args.route_failure_rate, "failure_rate").items():
+        route_config.setdefault(route, {}).update(config)
+    # Quota is unlimited upstream; main.py's own QuotaMeter still applies
+    upstream = FakeUpstream(daily_quota=10**9, catalog_size=args.catalog_size, latency=args.latency,
+                            jitter=args.jitter, failure_rate=args.failure_rate, throttle_rate=args.throttle_rate,
+                            route_config=route_config, fixtures_dir=args.fixtures)
+    base = await upstream.start()
+    scenarios = ["games", "videos", "findscripts"] if args.scenario == "all" else [args.scenario]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        workers = configure(upstream, base, cache_dir, args.workers)
+        try:
+            for scenario in scenarios:
+                report(scenario, *await run_scenario(scenario, args, upstream))
+        finally:
+            for process in workers:
+                process.terminate()
+            if main.job_queue is not None:
+                main.job_queue.close()
+            main.result_cache.close()
+            await main.close_http_session()
+            await upstream.stop()
+    if upstream.failures:
+        print(f"injected failures: {dict(upstream.failures)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["games", "videos", "findscripts", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent callers per iteration")
+    parser.add_argument("--warm", action="store_true", help="keep caches between iterations")
+    parser.add_argument("--workers", type=int, default=0, help="search worker processes (0 = in-process)")
+    parser.add_argument("--catalog-size", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--route-latency", action="append", metavar="ROUTE=SECONDS")
+    parser.add_argument("--route-failure-rate", action="append", metavar="ROUTE=FRACTION")
+    parser.add_argument("--fixtures", help="directory of recorded responses (see fake_upstream.py)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,145 @@
+"""
+Benchmark for video relevance scoring.
+
+Compares the original difflib.SequenceMatcher scorer with the batch scorer in
+main.py on synthetic but realistic candidates (script-video titles, long
+link-heavy descriptions, tag lists) and reports the speedup and how closely
+the two rankings agree.
+
+Usage: python bench_scoring.py [--games N] [--seed S]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+from main import score_videos
+
+GAMES = [
+    "Blox Fruits", "Grow a Garden", "Brookhaven RP", "Adopt Me", "Pet Simulator 99",
+    "Murder Mystery 2", "Da Hood", "Doors", "Arsenal", "Bee Swarm Simulator",
+    "Jailbreak", "Tower Defense Simulator", "King Legacy", "Blade Ball", "Dress to Impress"
+]
+TITLE_PATTERNS = [
+    "{game} Script | Auto Farm, Auto Quest {extra}",
+    "NEW {game} SCRIPT PASTEBIN {year} ({extra})",
+    "{game} Hack Script - Mobile & PC {extra}",
+    "[UPDATE] {game} Script GUI - No Key {extra}",
+    "Best {game} Script {year} *OP* {extra}",
+    "{game} gameplay but I {extra}",
+    "How to get FREE ROBUX in {game} {extra}",
+]
+EXTRAS = ["Undetected", "Keyless", "Delta Executor", "Fluxus", "Arceus X", "Solara",
+          "Infinite Money", "Kill Aura", "ESP", "Teleport", "Fly", "Speed"]
+FILLER = ("subscribe like comment join discord server executor download link below "
+          "works on mobile and pc delta fluxus arceus hydrogen codex roblox update "
+          "new patch bypass byfron hyperion keyless loadstring game pastebin").split()
+
+
+def make_description(rng, game):
+    parts = [f"{game} script showcase!", "Script:", f"https://pastebin.com/{rng.randrange(16**8):08x}"]
+    for _ in range(rng.randrange(60, 450)):
+        parts.append(rng.choice(FILLER))
+        if rng.random() < 0.03:
+            parts.append(f"https://discord.gg/{rng.randrange(16**6):06x}")
+    return " ".join(parts).lower()
+
+
+def make_candidates(rng, game, count):
+    candidates = []
+    for _ in range(count):
+        title = rng.choice(TITLE_PATTERNS).format(
+            game=game if rng.random() < 0.8 else rng.choice(GAMES),
+            extra=rng.choice(EXTRAS), year=rng.choice(["2023", "2024", "2025"])
+        ).lower()
+        desc = make_description(rng, game) if rng.random() < 0.9 else ""
+        tags = " ".join(rng.sample(FILLER, rng.randrange(0, 12)))
+        published = (datetime.now() - timedelta(days=rng.randrange(0, 700))).strftime("%Y-%m-%d")
+        candidates.append((title, desc, tags, published))
+    return candidates
+
+
+def legacy_score(title, desc, tags, search_words, published=None):
+    # The SequenceMatcher-based smart_video_score this benchmark replaces
+    score = 0.0
+    text = f"{title} {desc} {tags}".lower()
+    for word in search_words:
+        if word in text:
+            score += 1.0
+    for word in search_words:
+        for field in [title, desc, tags]:
+            score += SequenceMatcher(None, word, field).ratio()
+    if published:
+        try:
+            pub_date = datetime.strptime(published[:10], "%Y-%m-%d")
+            if pub_date > datetime.now() - timedelta(days=180):
+                score += 1.5
+            elif pub_date > datetime.now() - timedelta(days=365):
+                score += 0.5
+        except Exception:
+            pass
+    for bad in ["scam", "fake", "virus", "robux generator", "free robux"]:
+        if bad in text:
+            score -= 2.0
+    return score
+
+
+def ranks(values):
+    order = sorted(range(len(values)), key=lambda i: values[i], reverse=True)
+    result = [0] * len(values)
+    for rank, i in enumerate(order):
+        result[i] = rank
+    return result
+
+
+def spearman(a, b):
+    ra, rb = ranks(a), ranks(b)
+    n = len(a)
+    d2 = sum((x - y) ** 2 for x, y in zip(ra, rb))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=len(GAMES))
+    parser.add_argument("--per-game", type=int, default=15 * 15 * 3,
+                        help="candidates per game (15 videos x 15 queries x 3 providers)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workload = []
+    for game in GAMES[:args.games]:
+        search_words = [w.lower() for w in f"{game} {game.split()[0]}".split()]
+        workload.append((search_words, make_candidates(rng, game, args.per_game)))
+    total = sum(len(c) for _, c in workload)
+
+    start = time.perf_counter()
+    legacy = [[legacy_score(*c[:3], words, c[3]) for c in cands] for words, cands in workload]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = [score_videos(cands, words) for words, cands in workload]
+    batch_time = time.perf_counter() - start
+
+    rhos, top1, top5 = [], 0, 0.0
+    for old, new in zip(legacy, batch):
+        rhos.append(spearman(old, new))
+        old_rank, new_rank = ranks(old), ranks(new)
+        top1 += old_rank.index(0) == new_rank.index(0)
+        old_top5 = {i for i, r in enumerate(old_rank) if r < 5}
+        new_top5 = {i for i, r in enumerate(new_rank) if r < 5}
+        top5 += len(old_top5 & new_top5) / 5
+
+    print(f"candidates scored:  {total} ({len(workload)} games)")
+    print(f"SequenceMatcher:    {legacy_time * 1000:9.1f} ms  ({legacy_time / total * 1e6:7.1f} us/candidate)")
+    print(f"score_videos:       {batch_time * 1000:9.1f} ms  ({batch_time / total * 1e6:7.1f} us/candidate)")
+    print(f"speedup:            {legacy_time / batch_time:9.1f}x")
+    print(f"spearman rho:       {sum(rhos) / len(rhos):9.3f} (mean per game)")
+    print(f"top-1 agreement:    {top1}/{len(workload)}")
+    print(f"top-5 overlap:      {top5 / len(workload):9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Local stand-in for the upstream APIs main.py talks to, so the bot can be
+exercised and benchmarked without network access or real API keys.
+
+Routes (mount point -> main.py setting):
+  /rolimons/gametable           ROLIMONS_URL         gametable page with var game_details
+  /roproxy/v1/games/list        ROPROXY_GAMES_URL    games list JSON
+  /roblox/discover              ROBLOX_DISCOVER_URL  discover page with game cards
+  /apis/explore-api/v1/get-sorts   ROBLOX_APIS_BASE=<base>/apis
+  /apis/search-api/omni-search
+  /searchapi/api/v1/search      SEARCHAPI_URL        SearchApi.io youtube engine
+  /serpapi/search.json          SERPAPI_URL          SerpApi youtube engine
+  /camideo/                     CAMIDEO_URL          Camideo JSON
+  /duckduckgo/                  DUCKDUCKGO_URL       results page HTML
+  /google/search                GOOGLE_SEARCH_URL    results page HTML
+  /reddit/search/               REDDIT_SEARCH_URL    results page HTML
+  /youtube/v3/search            YOUTUBE_API_BASE=<base>/youtube/v3
+  /youtube/v3/videos              (search.list costs 100 units, videos.list 1)
+
+Responses are generated deterministically from the query, or replayed from
+a fixtures directory: a file named after the route (e.g. "rolimons.gametable",
+"serpapi.search") is served instead of the generated body. Every route can
+get added latency, jitter, a failure rate (503) and a throttle rate (429
+with Retry-After: 1), and every request is counted per route. YouTube
+quota is charged per API key like the real service (403 quotaExceeded once
+spent).
+
+Usage:
+  python fake_upstream.py --port 8765 --latency 0.05 --failure-rate 0.1
+  YOUTUBE_API_KEY=test YOUTUBE_API_BASE=http://127.0.0.1:8765/youtube/v3 python main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import html
+import json
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+SEARCH_COST = 100
+VIDEOS_COST = 1
+TITLE_PATTERNS = [
+    "{q} Script | Auto Farm + GUI",
+    "NEW {q} SCRIPT PASTEBIN (No Key)",
+    "{q} Hack Script - Mobile & PC",
+    "{q} gameplay #{n}",
+    "Best {q} Script *OP* Keyless",
+]
+GAME_WORDS = [
+    "Blox", "Fruits", "Grow", "Garden", "Brookhaven", "Adopt", "Pet", "Simulator", "Murder", "Mystery",
+    "Hood", "Doors", "Arsenal", "Bee", "Swarm", "Jailbreak", "Tower", "Defense", "Legacy", "Blade",
+    "Ball", "Dress", "Impress", "Tycoon", "Obby", "Piggy", "Rivals", "Fisch", "Dead", "Rails",
+]
+FEATURED_GAMES = [
+    "Blox Fruits", "Grow a Garden", "Brookhaven RP", "Adopt Me!", "Pet Simulator 99",
+    "Murder Mystery 2", "Da Hood", "Doors", "Arsenal", "Bee Swarm Simulator",
+]
+CONTENT_TYPES = {".json": "application/json", ".html": "text/html", ".txt": "text/plain"}
+
+
+def _rng(*parts):
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def make_catalog(size, seed=0):
+    # [(game_id, name, players)] with a few well-known titles on top
+    rng = _rng("catalog", seed)
+    games, seen = [], set()
+    for rank, name in enumerate(FEATURED_GAMES):
+        games.append((str(1000000 + rank), name, 500000 // (rank + 1)))
+        seen.add(name)
+    while len(games) < size:
+        name = " ".join(rng.sample(GAME_WORDS, rng.randrange(1, 4)))
+        if name in seen:
+            continue
+        seen.add(name)
+        games.append((str(2000000 + len(games)), name, int(rng.paretovariate(1.2) * 800)))
+    return games
+
+
+class FakeUpstream:
+    def __init__(self, daily_quota=10000, catalog_size=3000, latency=0.0, jitter=0.0,
+                 failure_rate=0.0, throttle_rate=0.0, route_config=None, fixtures_dir=None, seed=0):
+        self.daily_quota = daily_quota
+        self.catalog = make_catalog(catalog_size, seed)
+        # Route defaults, overridden per route name by route_config
+        self.default_config = {"latency": latency, "jitter": jitter, "failure_rate": failure_rate,
+                               "throttle_rate": throttle_rate}
+        self.route_config = dict(route_config or {})
+        self.fixtures_dir = fixtures_dir
+        self.failure_rng = random.Random(seed)
+        self.quota_used = Counter()  # api key -> units
+        self.requests = Counter()  # route -> count
+        self.failures = Counter()  # route -> injected failures
+        self.videos = {}  # video id -> snippet, filled as searches return them
+        self.app = web.Application(middlewares=[self._middleware])
+        routes = [
+            ("/rolimons/gametable", "rolimons.gametable", self.rolimons_gametable),
+            ("/roproxy/v1/games/list", "roproxy.games", self.roproxy_games),
+            ("/roblox/discover", "roblox.discover", self.roblox_discover),
+            ("/apis/explore-api/v1/get-sorts", "explore-api.sorts", self.explore_sorts),
+            ("/apis/search-api/omni-search", "search-api.omni", self.omni_search),
+            ("/searchapi/api/v1/search", "searchapi.search", self.searchapi_search),
+            ("/serpapi/search.json", "serpapi.search", self.serpapi_search),
+            ("/camideo/", "camideo.search", self.camideo_search),
+            ("/duckduckgo/", "duckduckgo.search", self.results_page),
+            ("/google/search", "google.search", self.results_page),
+            ("/reddit/search/", "reddit.search", self.results_page),
+            ("/youtube/v3/search", "youtube.search", self.youtube_search),
+            ("/youtube/v3/videos", "youtube.videos", self.youtube_videos),
+        ]
+        for path, name, handler in routes:
+            self.app.router.add_get(path, handler, name=name)
+        self._runner = None
+
+    def config_for(self, route):
+        return {**self.default_config, **self.route_config.get(route, {})}
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        route = request.match_info.route.name or request.path
+        self.requests[route] += 1
+        config = self.config_for(route)
+        delay = config["latency"] + self.failure_rng.uniform(0, config["jitter"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.failure_rng.random() < config["failure_rate"]:
+            self.failures[route] += 1
+            return web.Response(status=503, text="Injected failure")
+        if self.failure_rng.random() < config["throttle_rate"]:
+            self.failures[route + " (429)"] += 1
+            return web.Response(status=429, text="Too Many Requests", headers={"Retry-After": "1"})
+        fixture = self._fixture(route)
+        if fixture is not None:
+            return fixture
+        return await handler(request)
+
+    def _fixture(self, route):
+        if not self.fixtures_dir:
+            return None
+        for ext, content_type in CONTENT_TYPES.items():
+            path = os.path.join(self.fixtures_dir, route + ext)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return web.Response(body=f.read(), content_type=content_type)
+        return None
+
+    def _video(self, query, n):
+        rng = _rng(query, n)
+        video_id = hashlib.sha1(f"{query}|{n}".encode()).hexdigest()[:11]
+        published = datetime.now(timezone.utc) - timedelta(days=rng.randrange(0, 700))
+        snippet = {
+            "title": rng.choice(TITLE_PATTERNS).format(q=query.title(), n=n),
+            "description": f"{query} script showcase. Script: https://pastebin.com/{video_id} "
+                           + " ".join(rng.choice(["delta", "fluxus", "keyless", "subscribe", "update", "executor"])
+                                      for _ in range(rng.randrange(20, 200))),
+            "tags": rng.sample(["roblox", "script", "hack", "pastebin", "gui", "auto farm", "2025"], 4),
+            "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "channelTitle": f"channel{rng.randrange(1000)}",
+        }
+        self.videos[video_id] = snippet
+        return video_id, snippet
+
+    def _video_results(self, query, count):
+        # Provider-neutral dicts for the scraping-API style responses
+        results = []
+        for n in range(count):
+            video_id, snippet = self._video(query, n)
+            results.append({
+                "title": snippet["title"],
+                "description": snippet["description"][:300],
+                "keywords": snippet["tags"],
+                "published": snippet["publishedAt"][:10],
+                "link": f"https://www.youtube.com/watch?v={video_id}",
+            })
+        return results
+
+    # --- Game sources ---
+    async def rolimons_gametable(self, request):
+        entries = ",".join(
+            f'"{game_id}":{json.dumps([name, 0, 0, players, 0, 0, ""])}'
+            for game_id, name, players in self.catalog
+        )
+        body = ("<html><head><title>Game Table</title></head><body><script>"
+                f"var game_details = {{{entries}}};\nvar other = 1;</script>"
+                + "<div class='row'></div>" * 2000 + "</body></html>")
+        return web.Response(text=body, content_type="text/html")
+
+    async def roproxy_games(self, request):
+        limit = int(request.query.get("limit", 20))
+        data = [{"id": int(game_id), "name": name, "playing": players}
+                for game_id, name, players in self.catalog[:limit]]
+        return web.json_response({"data": data})
+
+    async def roblox_discover(self, request):
+        cards = "".join(
+            f'<div class="game-card-container"><a href="https://www.roblox.com/games/{game_id}/">'
+            f'<span class="game-card-name">{html.escape(name)}</span>'
+            f'<span class="game-card-player-count">{players:,}</span></a></div>'
+            for game_id, name, players in self.catalog[:200]
+        )
+        return web.Response(text=f"<html><body>{cards}</body></html>", content_type="text/html")
+
+    async def explore_sorts(self, request):
+        sorts = []
+        for start in range(0, 300, 50):
+            entries = [{"id": int(game_id), "name": name, "playing": players}
+                       for game_id, name, players in self.catalog[start:start + 50]]
+            sorts.append({"sortId": f"sort{start // 50}", "entries": entries})
+        return web.json_response({"sorts": sorts})
+
+    async def omni_search(self, request):
+        games = [{"id": int(game_id), "name": name, "playing": players}
+                 for game_id, name, players in self.catalog[:100]]
+        return web.json_response({"games": games})
+
+    # --- Video sources ---
+    async def searchapi_search(self, request):
+        query = request.query.get("q", "")
+        return web.json_response({"videos": self._video_results(query, 15)})
+
+    async def serpapi_search(self, request):
+        query = request.query.get("search_query", request.query.get("q", ""))
+        return web.json_response({"video_results": self._video_results(query, 15)})
+
+    async def camideo_search(self, request):
+        query = request.query.get("q", "")
+        return web.json_response({"Camideo": {"videos": self._video_results(query, 15)}})
+
+    async def results_page(self, request):
+        query = request.query.get("q", "")
+        anchors = []
+        for n, result in enumerate(self._video_results(query, 10)):
+            anchors.append(f'<div class="result"><a class="result__a" href="{html.escape(result["link"])}">'
+                           f'<b>{html.escape(result["title"])}</b></a></div>')
+            if n % 3 == 0:
+                paste = result["link"].rsplit("=", 1)[1]
+                anchors.append(f'<a href="https://pastebin.com/{paste}">{html.escape(query)} script pastebin</a>')
+        filler = "<div class='nav'><a href='/settings'>Settings</a></div>" * 200
+        return web.Response(text=f"<html><body>{filler}{''.join(anchors)}</body></html>", content_type="text/html")
+
+    # --- YouTube Data API ---
+    def _charge(self, request, units):
+        key = request.query.get("key")
+        if not key:
+            return _youtube_error(400, "keyInvalid", "API key not valid.")
+        if self.quota_used[key] + units > self.daily_quota:
+            return _youtube_error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        self.quota_used[key] += units
+        return None
+
+    async def youtube_search(self, request):
+        error = self._charge(request, SEARCH_COST)
+        if error is not None:  # Responses are empty mappings, so falsy
+            return error
+        query = request.query.get("q", "")
+        max_results = min(int(request.query.get("maxResults", 5)), 50)
+        parts = request.query.get("part", "").split(",")
+        items = []
+        for n in range(max_results):
+            video_id, snippet = self._video(query, n)
+            item = {"kind": "youtube#searchResult", "id": {"kind": "youtube#video", "videoId": video_id}}
+            if "snippet" in parts:
+                # search.list truncates descriptions and never returns tags
+                item["snippet"] = {"title": snippet["title"], "description": snippet["description"][:160],
+                                   "publishedAt": snippet["publishedAt"]}
+            items.append(item)
+        return web.json_response({"kind": "youtube#searchListResponse", "items": items})
+
+    async def youtube_videos(self, request):
+        error = self._charge(request, VIDEOS_COST)
+        if error is not None:  # Responses are empty mappings, so falsy
+            return error
+        ids = [i for i in request.query.get("id", "").split(",") if i]
+        if len(ids) > 50:
+            return _youtube_error(400, "badRequest", "Too many IDs (max 50).")
+        items = [{"kind": "youtube#video", "id": i, "snippet": self.videos[i]} for i in ids if i in self.videos]
+        return web.json_response({"kind": "youtube#videoListResponse", "items": items})
+
+    def settings(self, base):
+        # main.py module settings that point every upstream at this server
+        return {
+            "ROLIMONS_URL": f"{base}/rolimons/gametable",
+            "ROPROXY_GAMES_URL": f"{base}/roproxy/v1/games/list",
+            "ROBLOX_DISCOVER_URL": f"{base}/roblox/discover",
+            "ROBLOX_APIS_BASE": f"{base}/apis",
+            "SEARCHAPI_URL": f"{base}/searchapi/api/v1/search",
+            "SERPAPI_URL": f"{base}/serpapi/search.json",
+            "CAMIDEO_URL": f"{base}/camideo/",
+            "DUCKDUCKGO_URL": f"{base}/duckduckgo/",
+            "GOOGLE_SEARCH_URL": f"{base}/google/search",
+            "REDDIT_SEARCH_URL": f"{base}/reddit/search/",
+            "YOUTUBE_API_BASE": f"{base}/youtube/v3",
+        }
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets
+        return f"http://{host}:{sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _youtube_error(status, reason, message):
+    return web.json_response(
+        {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}},
+        status=status,
+    )
+
+
+async def _serve(host, port, **options):
+    upstream = FakeUpstream(**options)
+    base = await upstream.start(host, port)
+    print(f"Fake upstream listening on {base}")
+    for name, value in upstream.settings(base).items():
+        print(f"  {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await upstream.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--daily-quota", type=int, default=10000)
+    parser.add_argument("--catalog-size", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--fixtures", help="directory of recorded responses named after their route")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, daily_quota=args.daily_quota, catalog_size=args.catalog_size,
+                           latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                           throttle_rate=args.throttle_rate, fixtures_dir=args.fixtures))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
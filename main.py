@@ -1,18 +1,33 @@
+import time
+STARTED_AT = time.perf_counter()  # startup phases are timed from here
 import os
 import aiohttp
 import threading
-from flask import Flask
-from bs4 import BeautifulSoup
 import discord
 from discord.ext import commands
 import asyncio
 import uuid
+import codecs
+import html as html_lib
+import json
+import sqlite3
+import functools
+import hashlib
+import heapq
+import random
+import contextvars
+import contextlib
+import bisect
+import sys
+import multiprocessing
+from collections import OrderedDict, deque
 from typing import List
 import re  # Add this import for regex parsing
-import difflib  # For fuzzy matching
-from datetime import datetime, timedelta
-# Helper for advanced fuzzy matching and scoring
-from difflib import SequenceMatcher
+from datetime import datetime, timedelta, timezone
+try:
+    import fcntl
+except ImportError:  # Windows: the quota file isn't locked between processes
+    fcntl = None
 
 # Environment variables
 DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
@@ -21,109 +36,721 @@ SEARCHAPI_IO_KEY = os.environ.get("SEARCHAPI_IO_KEY")
 SERPAPI_KEY = os.environ.get("SERPAPI_KEY")
 CAMIDEO_KEY = os.environ.get("CAMIDEO_KEY")
 ROBLOX_MIN_PLAYERS = 5000
+ROLIMONS_CHUNK_SIZE = 64 * 1024  # bytes read per step while streaming the gametable
+
+# Upstream endpoints (overridable, e.g. to point everything at fake_upstream.py)
+ROLIMONS_URL = os.environ.get("ROLIMONS_URL", "https://www.rolimons.com/gametable")
+ROPROXY_GAMES_URL = os.environ.get("ROPROXY_GAMES_URL", "https://games.roproxy.com/v1/games/list")
+ROBLOX_DISCOVER_URL = os.environ.get("ROBLOX_DISCOVER_URL", "https://www.roblox.com/discover")
+ROBLOX_APIS_BASE = os.environ.get("ROBLOX_APIS_BASE", "https://apis.roblox.com")
+SEARCHAPI_URL = os.environ.get("SEARCHAPI_URL", "https://www.searchapi.io/api/v1/search")
+SERPAPI_URL = os.environ.get("SERPAPI_URL", "https://serpapi.com/search.json")
+CAMIDEO_URL = os.environ.get("CAMIDEO_URL", "http://api.camideo.com/")
+DUCKDUCKGO_URL = os.environ.get("DUCKDUCKGO_URL", "https://duckduckgo.com/")
+GOOGLE_SEARCH_URL = os.environ.get("GOOGLE_SEARCH_URL", "https://www.google.com/search")
+REDDIT_SEARCH_URL = os.environ.get("REDDIT_SEARCH_URL", "https://www.reddit.com/search/")
+
+# Shared HTTP session tuning (seconds / connection counts)
+HTTP_TOTAL_TIMEOUT = float(os.environ.get("HTTP_TOTAL_TIMEOUT", 20))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 15))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_PER_HOST = int(os.environ.get("HTTP_MAX_PER_HOST", 10))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", 300))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 30))
+
+# Retries (exponential backoff with jitter) and per-source circuit breakers:
+# a source is skipped for BREAKER_COOLDOWN seconds after
+# BREAKER_FAILURE_THRESHOLD consecutive failed requests
+RETRY_ATTEMPTS = int(os.environ.get("RETRY_ATTEMPTS", 3))
+RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", 0.5))
+RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", 4))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 3))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", 120))
+
+# Overall budget for the concurrent game-source fan-out (seconds)
+GAME_SOURCES_DEADLINE = float(os.environ.get("GAME_SOURCES_DEADLINE", 12))
+
+# Game-list cache: lists are fresh for GAME_CACHE_TTL, then served stale
+# (while refreshed in the background) for up to GAME_CACHE_STALE_TTL more
+GAME_CACHE_TTL = float(os.environ.get("GAME_CACHE_TTL", 300))
+GAME_CACHE_STALE_TTL = float(os.environ.get("GAME_CACHE_STALE_TTL", 1800))
+GAME_CACHE_MAX_GAMES = int(os.environ.get("GAME_CACHE_MAX_GAMES", 5000))  # per source
+GAME_CACHE_MAX_SOURCES = int(os.environ.get("GAME_CACHE_MAX_SOURCES", 16))
+# Keyword index over the cached catalog: rebuild period and max age to trust it
+GAME_INDEX_REFRESH = float(os.environ.get("GAME_INDEX_REFRESH", 300))
+GAME_INDEX_MAX_AGE = float(os.environ.get("GAME_INDEX_MAX_AGE", 900))
+# Game lists saved on every index rebuild and at shutdown, and loaded at
+# startup so the first commands after a restart are answered from the cache
+GAME_CACHE_SNAPSHOT_PATH = os.environ.get("GAME_CACHE_SNAPSHOT_PATH", "scriptsearch_games.json")
+
+# Persistent video-result cache (SQLite file; survives restarts). This and
+# the other *_PATH state files default to the working directory, which
+# Render wipes on deploy; render.yaml points them at a persistent disk.
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", "scriptsearch_cache.sqlite3")
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 6 * 3600))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 20000))
+# Storage behind the result cache: "sqlite" (RESULT_CACHE_PATH, shared by all
+# processes on the host) or "memory" (per process); see CACHE_BACKENDS
+RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "sqlite")
+
+# YouTube Data API: search.list costs 100 quota units, videos.list 1 unit
+# per call (up to 50 IDs), out of a default daily quota of 10,000 units
+YOUTUBE_API_BASE = os.environ.get("YOUTUBE_API_BASE", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_API_DAILY_QUOTA = int(os.environ.get("YOUTUBE_API_DAILY_QUOTA", 10000))
+YOUTUBE_API_QUERIES = int(os.environ.get("YOUTUBE_API_QUERIES", 2))  # query variants per search
+YOUTUBE_API_MAX_RESULTS = int(os.environ.get("YOUTUBE_API_MAX_RESULTS", 25))
+YOUTUBE_API_CONCURRENCY = int(os.environ.get("YOUTUBE_API_CONCURRENCY", 2))
+
+# Outbound request rate per provider/host as (requests per second, burst),
+# shared by every command; waiting requests are served round-robin by guild
+RATE_LIMITS = {
+    "SearchApi.io": (float(os.environ.get("SEARCHAPI_RATE", 5)), int(os.environ.get("SEARCHAPI_BURST", 15))),
+    "SerpApi": (float(os.environ.get("SERPAPI_RATE", 5)), int(os.environ.get("SERPAPI_BURST", 15))),
+    "Camideo": (float(os.environ.get("CAMIDEO_RATE", 2)), int(os.environ.get("CAMIDEO_BURST", 6))),
+    "YouTube API": (float(os.environ.get("YOUTUBE_API_RATE", 10)), int(os.environ.get("YOUTUBE_API_BURST", 10))),
+    "DuckDuckGo": (float(os.environ.get("DUCKDUCKGO_RATE", 2)), int(os.environ.get("DUCKDUCKGO_BURST", 6))),
+    "Google": (float(os.environ.get("GOOGLE_RATE", 1)), int(os.environ.get("GOOGLE_BURST", 3))),
+    "Reddit": (float(os.environ.get("REDDIT_RATE", 1)), int(os.environ.get("REDDIT_BURST", 3))),
+}
+# Pause after a 429 that doesn't say how long to wait (seconds)
+RATE_LIMIT_DEFAULT_PAUSE = float(os.environ.get("RATE_LIMIT_DEFAULT_PAUSE", 30))
+# Daily budget per provider, 0 = unlimited. Requests, except YouTube which
+# counts quota units. Usage is kept in QUOTA_STATE_PATH across restarts.
+DAILY_QUOTAS = {
+    "SearchApi.io": int(os.environ.get("SEARCHAPI_DAILY_QUOTA", 0)),
+    "SerpApi": int(os.environ.get("SERPAPI_DAILY_QUOTA", 0)),
+    "Camideo": int(os.environ.get("CAMIDEO_DAILY_QUOTA", 0)),
+    "YouTube API": YOUTUBE_API_DAILY_QUOTA,
+}
+QUOTA_STATE_PATH = os.environ.get("QUOTA_STATE_PATH", "scriptsearch_quota.json")
+
+# Parallel queries per video provider (kept under each API's rate limit)
+SEARCHAPI_CONCURRENCY = int(os.environ.get("SEARCHAPI_CONCURRENCY", 5))
+SERPAPI_CONCURRENCY = int(os.environ.get("SERPAPI_CONCURRENCY", 5))
+CAMIDEO_CONCURRENCY = int(os.environ.get("CAMIDEO_CONCURRENCY", 3))
+# Time budget for one provider pass over all of its queries (seconds)
+PROVIDER_DEADLINE = float(os.environ.get("PROVIDER_DEADLINE", 8))
+# Provider racing: how many providers run at once, when a slow one gets a
+# hedge (its p90 latency, or PROVIDER_HEDGE_AFTER until enough samples) and
+# the score a result needs to count towards stopping early
+PROVIDER_RACE_WIDTH = int(os.environ.get("PROVIDER_RACE_WIDTH", 2))
+PROVIDER_HEDGE_AFTER = float(os.environ.get("PROVIDER_HEDGE_AFTER", 3))
+PROVIDER_SCORE_THRESHOLD = float(os.environ.get("PROVIDER_SCORE_THRESHOLD", 2.0))
+PROVIDER_STATS_WINDOW = int(os.environ.get("PROVIDER_STATS_WINDOW", 50))
+# Background prefetch of script videos for the most-played games
+PREFETCH_INTERVAL = float(os.environ.get("PREFETCH_INTERVAL", 1800))
+PREFETCH_INITIAL_DELAY = float(os.environ.get("PREFETCH_INITIAL_DELAY", 60))
+PREFETCH_TOP_GAMES = int(os.environ.get("PREFETCH_TOP_GAMES", 30))
+PREFETCH_MAX_VIDEOS = int(os.environ.get("PREFETCH_MAX_VIDEOS", 3))
+# Hourly budget in provider quota units (a request, or YouTube's per-call cost)
+PREFETCH_MAX_UNITS_PER_HOUR = int(os.environ.get("PREFETCH_MAX_UNITS_PER_HOUR", 1000))
+# Share of each provider's daily quota kept for commands: prefetch stops
+# using a provider once less than this is left
+PREFETCH_QUOTA_RESERVE = float(os.environ.get("PREFETCH_QUOTA_RESERVE", 0.5))
+# Games searched for videos at once, across all running commands (with
+# search workers: SEARCH_WORKERS * WORKER_CONCURRENCY instead)
+GAME_SEARCH_CONCURRENCY = int(os.environ.get("GAME_SEARCH_CONCURRENCY", 4))
+# Minimum gap between edits of one results message (milliseconds)
+EMBED_FLUSH_INTERVAL_MS = int(os.environ.get("EMBED_FLUSH_INTERVAL_MS", 1500))
+# Recent command timelines kept for /debug/trace
+DEBUG_TRACE_SIZE = int(os.environ.get("DEBUG_TRACE_SIZE", 50))
+
+# Search workers: with SEARCH_WORKERS > 0 each game's video search is handed
+# to that many worker processes through a job queue in JOB_QUEUE_PATH. The
+# bot starts them itself unless SEARCH_WORKERS_EXTERNAL is set, in which case
+# run `python main.py --workers` separately on the same host. Workers share
+# the result cache and quota file and split each provider's rate limit.
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", 0))
+SEARCH_WORKERS_EXTERNAL = os.environ.get("SEARCH_WORKERS_EXTERNAL", "").lower() in ("1", "true", "yes")
+JOB_QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "scriptsearch_jobs.sqlite3")
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", GAME_SEARCH_CONCURRENCY))  # jobs per worker
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 0.1))
+# A job is given up (queued) or handed to another worker (running) after
+# this long without a sign of life (seconds)
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", 60))
+
+# Hash of the slash-command schema last synced to Discord; tree.sync is
+# skipped at startup while it matches (FORCE_COMMAND_SYNC=1 to sync anyway)
+COMMAND_SYNC_STATE_PATH = os.environ.get("COMMAND_SYNC_STATE_PATH", "scriptsearch_commands.json")
+FORCE_COMMAND_SYNC = os.environ.get("FORCE_COMMAND_SYNC", "").lower() in ("1", "true", "yes")
 
 # Flask web service (to keep Render alive)
-app = Flask(__name__)
-@app.route("/")
-def index():
-    return "✅ Bot is running."
+def create_app():
+    # Flask is only imported by the process that serves it
+    from flask import Flask, Response
 
-# Discord Bot client
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="/", intents=intents)
+    app = Flask(__name__)
+    @app.route("/")
+    def index():
+        return "✅ Bot is running."
 
-# --- Roblox Game Search Functions ---
-def smart_match(game_name: str, keywords: List[str]) -> bool:
-    name = game_name.lower()
-    return all(any(kw in word for word in name.split()) or kw in name for kw in keywords)
+    @app.route("/circuits")
+    def circuits():
+        # Circuit breaker state per upstream source, for ops
+        return {name: breaker.snapshot() for name, breaker in list(circuit_breakers.items())}
 
-async def fetch_roblox_games_rolimons():
-    url = "https://www.rolimons.com/gametable"
+    @app.route("/limits")
+    def limits():
+        # Outbound rate limiter and daily quota state per provider, for ops
+        return {
+            "rate_limiters": {name: limiter.snapshot() for name, limiter in list(rate_limiters.items())},
+            "quotas": {name: meter.snapshot() for name, meter in list(quota_meters.items())},
+        }
+
+    @app.route("/providers")
+    def providers():
+        # What the video provider scheduler ranks and hedges on, for ops
+        return provider_scheduler.snapshot()
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/debug/trace")
+    def debug_trace():
+        # Most recent command first, including ones still running
+        return {"traces": [trace.snapshot() for trace in reversed(list(command_traces))]}
+
+    return app
+
+# --- Metrics ---
+class Metric:
+    """
+    One Prometheus metric family. Samples are keyed by their label values (in
+    labelnames order). Updated from the bot's event loop and read from Flask's
+    thread, hence the lock.
+    """
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _label_text(self, labels, extra=()):
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{self._escape(v)}"' for k, v in pairs) + "}"
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def samples(self):
+        with self._lock:
+            return list(self.values.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.samples():
+            lines.append(f"{self.name}{self._label_text(labels)} {value:g}")
+        return lines
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), collect=None):
+        super().__init__(name, help_text, labelnames)
+        self.collect = collect  # optional callable returning {labels: value} at scrape time
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self.values[labels] = value
+
+    def samples(self):
+        if self.collect is not None:
+            return list(self.collect().items())
+        return super().samples()
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            sample = self.values.get(labels)
+            if sample is None:
+                # [per-bucket counts (last one is +Inf), sum]
+                sample = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            sample[0][bisect.bisect_left(self.buckets, value)] += 1
+            sample[1] += value
+
+    def samples(self):
+        with self._lock:
+            return [(labels, (list(counts), total)) for labels, (counts, total) in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, (counts, total) in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{self._label_text(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {total:g}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    # In-house Prometheus text exposition; avoids a client library dependency
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"[Metrics] Failed to render {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+http_requests = metrics.register(CounterMetric(
+    "scriptsearch_http_requests_total", "Upstream HTTP requests by source and status (or error)", ("source", "status")))
+http_request_seconds = metrics.register(HistogramMetric(
+    "scriptsearch_http_request_seconds", "Upstream HTTP request latency by source", ("source",)))
+source_fetch_seconds = metrics.register(HistogramMetric(
+    "scriptsearch_source_fetch_seconds", "Game source fetch latency, retries included", ("source", "outcome")))
+source_retries = metrics.register(CounterMetric(
+    "scriptsearch_source_retries_total", "Retries after a failed upstream attempt", ("source",)))
+provider_seconds = metrics.register(HistogramMetric(
+    "scriptsearch_provider_seconds", "Video provider latency by outcome", ("provider", "outcome")))
+cache_requests = metrics.register(CounterMetric(
+    "scriptsearch_cache_requests_total", "Cache lookups by cache, key source and result", ("cache", "source", "result")))
+commands_in_flight = metrics.register(GaugeMetric(
+    "scriptsearch_commands_in_flight", "Commands currently running", ("command",)))
+command_seconds = metrics.register(HistogramMetric(
+    "scriptsearch_command_seconds", "Time from command start until a stage completed (games, first_video, total)",
+    ("command", "stage"),
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)))
+rate_limit_wait_seconds = metrics.register(HistogramMetric(
+    "scriptsearch_rate_limit_wait_seconds", "Time requests waited for an outbound rate limiter", ("limiter",)))
+commands_total = metrics.register(CounterMetric(
+    "scriptsearch_commands_total", "Finished commands by outcome", ("command", "outcome")))
+startup_seconds = metrics.register(GaugeMetric(
+    "scriptsearch_startup_seconds", "Seconds from process start until each startup phase", ("phase",)))
+
+def mark_startup(phase):
+    seconds = time.perf_counter() - STARTED_AT
+    startup_seconds.set(phase, value=seconds)
+    print(f"[Startup] {phase}: {seconds:.2f}s")
+
+def cache_hit_ratios():
+    totals = {}
+    for (cache, source, result), count in cache_requests.samples():
+        hits, lookups = totals.get((cache, source), (0, 0))
+        totals[(cache, source)] = (hits + (count if result != "miss" else 0), lookups + count)
+    return {key: hits / lookups for key, (hits, lookups) in totals.items() if lookups}
+
+def circuit_states():
+    return {(name,): 0 if breaker.state == "closed" else 1 for name, breaker in list(circuit_breakers.items())}
+
+metrics.register(GaugeMetric(
+    "scriptsearch_cache_hit_ratio", "Share of cache lookups answered from cache (stale included)",
+    ("cache", "source"), collect=cache_hit_ratios))
+metrics.register(GaugeMetric(
+    "scriptsearch_quota_remaining", "Daily quota left per provider (units or requests)", ("provider",),
+    collect=lambda: {
+        (name,): meter.daily_limit - meter.snapshot()["used"] for name, meter in list(quota_meters.items()) if meter.daily_limit
+    }))
+metrics.register(GaugeMetric(
+    "scriptsearch_circuit_open", "1 while a source's circuit breaker is open or half-open", ("source",),
+    collect=circuit_states))
+
+# Which upstream source the current request belongs to (labels HTTP metrics)
+metrics_source = contextvars.ContextVar("metrics_source", default=None)
+
+@contextlib.contextmanager
+def upstream_source(label):
+    token = metrics_source.set(label)
     try:
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(3):  # Retry logic
-                try:
-                    async with session.get(url) as resp:
-                        if resp.status != 200:
-                            print(f"[Rolimons] HTTP status: {resp.status}")
-                            await asyncio.sleep(1)
-                            continue
-                        html = await resp.text()
-                        break
-                except Exception as e:
-                    print(f"[Rolimons] Attempt {attempt+1} failed: {e}")
-                    await asyncio.sleep(1)
-            else:
-                return [], "Rolimons: Failed after 3 attempts."
-    except Exception as e:
-        print(f"[Rolimons] Error fetching: {e}")
-        return [], f"Error fetching Rolimons: {e}"
-    # Parse the JS variable game_details
-    match = re.search(r"var game_details = (\{.*?\});", html, re.DOTALL)
-    if not match:
-        print("[Rolimons] Could not find game_details JS variable.")
-        return [], "Could not find game_details on Rolimons. The site structure may have changed."
+        yield
+    finally:
+        metrics_source.reset(token)
+
+def http_trace_config():
+    # Times every request made through the shared session and counts statuses
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.monotonic()
+        ctx.source = metrics_source.get() or params.url.host or "unknown"
+
+    async def on_request_end(session, ctx, params):
+        http_requests.inc(ctx.source, str(params.response.status))
+        http_request_seconds.observe(time.monotonic() - ctx.start, ctx.source)
+
+    async def on_request_exception(session, ctx, params):
+        # Requests dropped by a deadline or a finished race aren't upstream errors
+        cancelled = isinstance(params.exception, asyncio.CancelledError)
+        http_requests.inc(ctx.source, "cancelled" if cancelled else "error")
+        http_request_seconds.observe(time.monotonic() - ctx.start, ctx.source)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+class CommandTrace:
+    # Timeline of one command: (seconds since start, event, detail) entries
+    def __init__(self, command, args):
+        self.id = uuid.uuid4().hex[:8]
+        self.command = command
+        self.args = args
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self.finished = None
+        self.events = []
+
+    def mark(self, event, detail=""):
+        self.events.append((round(time.monotonic() - self._start, 3), event, detail))
+
+    def finish(self, outcome):
+        self.mark("finished", outcome)
+        self.finished = round(time.monotonic() - self._start, 3)
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "command": self.command,
+            "args": self.args,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration": self.finished,
+            "events": [{"t": t, "event": event, "detail": detail} for t, event, detail in list(self.events)],
+        }
+
+command_traces = deque(maxlen=DEBUG_TRACE_SIZE)
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+def trace_event(event, detail=""):
+    # No-op outside a traced command
+    trace = current_trace.get()
+    if trace is not None:
+        trace.mark(event, detail)
+
+# --- Shared HTTP session ---
+# One pooled session for every fetcher so connections (and TLS handshakes)
+# to the same hosts are reused across retries, queries and commands.
+http_session = None
+
+def get_http_session():
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_PER_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=HTTP_TOTAL_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT,
+            sock_read=HTTP_READ_TIMEOUT,
+        )
+        http_session = aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[http_trace_config()])
+    return http_session
+
+async def close_http_session():
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+# --- Retries and circuit breakers ---
+class UpstreamError(Exception):
+    pass
+
+class RateLimitedError(UpstreamError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def retry_after_seconds(resp):
+    # Retry-After in seconds; the HTTP-date form is treated as unknown
     try:
-        import json
-        # The JS object uses double quotes, so it's valid JSON
-        game_details = json.loads(match.group(1))
-    except Exception as e:
-        print(f"[Rolimons] Error parsing game_details: {e}")
-        return [], f"Error parsing game_details: {e}"
-    games = []
-    for game_id, entry in game_details.items():
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+def check_status(resp):
+    if resp.status == 429:
+        raise RateLimitedError("HTTP status: 429", retry_after_seconds(resp))
+    if resp.status != 200:
+        raise UpstreamError(f"HTTP status: {resp.status}")
+
+class CircuitBreaker:
+    """
+    Closed: requests flow. After `threshold` consecutive failures it opens and
+    requests are refused for `cooldown` seconds. Then one trial request is let
+    through (half-open): success closes the breaker, failure reopens it.
+    """
+    def __init__(self, name, threshold, cooldown):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_rejections = 0
+
+    def allow(self):
+        if self.state == "closed":
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            # Let one trial through; others wait for another cooldown unless it succeeds
+            self._transition("half-open")
+            self.opened_at = time.monotonic()
+            return True
+        self.total_rejections += 1
+        return False
+
+    def retry_in(self):
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != "closed":
+            self._transition("closed")
+
+    def record_failure(self):
+        self.failures += 1
+        self.total_failures += 1
+        if self.state == "half-open" or (self.state == "closed" and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self._transition("open")
+
+    def _transition(self, state):
+        print(f"[CircuitBreaker] {self.name}: {self.state} -> {state}")
+        self.state = state
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in": round(self.retry_in(), 1) if self.state != "closed" else 0,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+        }
+
+circuit_breakers = {}
+
+def get_breaker(name):
+    breaker = circuit_breakers.get(name)
+    if breaker is None:
+        breaker = circuit_breakers[name] = CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN)
+    return breaker
+
+def backoff_delay(attempt):
+    # Exponential backoff with "equal jitter"
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+async def fetch_with_retry(label, attempt_request):
+    """
+    Await attempt_request() up to RETRY_ATTEMPTS times behind label's circuit
+    breaker, backing off between failures. Returns (result, error).
+    """
+    breaker = get_breaker(label)
+    error = None
+    start = time.monotonic()
+
+    def done(outcome, detail=""):
+        source_fetch_seconds.observe(time.monotonic() - start, label, outcome)
+        trace_event(f"{label} {outcome}", detail)
+
+    with upstream_source(label):
+        for attempt in range(RETRY_ATTEMPTS):
+            if not breaker.allow():
+                done("skipped")
+                return None, f"Skipped, circuit open (retry in {breaker.retry_in():.0f}s)."
+            try:
+                result = await attempt_request()
+            except Exception as e:
+                breaker.record_failure()
+                error = e
+                print(f"[{label}] Attempt {attempt+1} failed: {e}")
+                if attempt + 1 < RETRY_ATTEMPTS:
+                    source_retries.inc(label)
+                    await asyncio.sleep(backoff_delay(attempt))
+                continue
+            breaker.record_success()
+            done("ok", f"{attempt + 1} attempt(s)")
+            return result, None
+    done("error", str(error))
+    return None, f"Failed after {RETRY_ATTEMPTS} attempts: {error}"
+
+# --- Request coalescing ---
+class StreamFlight:
+    # One shared run of an async generator, fanned out to its subscribers
+    def __init__(self, stream, snapshots):
+        self.snapshots = snapshots
+        self.history = []  # events a late subscriber replays
+        self.queues = []
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self.task = asyncio.create_task(self._run(stream))
+
+    async def _run(self, stream):
         try:
-            name = entry[0]
-            players = entry[3]
-            if players >= ROBLOX_MIN_PLAYERS:
-                games.append((name, players, game_id))
+            async with contextlib.aclosing(stream) as events:
+                async for event in events:
+                    if self.snapshots:
+                        self.history = [event]
+                    else:
+                        self.history.append(event)
+                    for queue in self.queues:
+                        queue.put_nowait(event)
         except Exception as e:
-            print(f"[Rolimons] Error parsing entry: {e}")
-            continue
-    return games, None
+            self.error = e
+        finally:
+            self.done = True
+            for queue in self.queues:
+                queue.put_nowait(None)
 
-async def fetch_roblox_games_roproxy():
-    url = "https://games.roproxy.com/v1/games/list?sortToken=&sortOrder=Asc&limit=20"
-    for attempt in range(3):
+    async def subscribe(self):
+        queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.done:
+            queue.put_nowait(None)
+        else:
+            self.queues.append(queue)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        print(f"[roproxy] HTTP status: {resp.status}")
-                        await asyncio.sleep(1)
-                        continue
-                    data = await resp.json()
-                    games = []
-                    for g in data.get("data", []):
-                        name = g.get("name")
-                        players = g.get("playing", 0)
-                        game_id = str(g.get("id")) if g.get("id") else None
-                        if name and players >= ROBLOX_MIN_PLAYERS and game_id:
-                            games.append((name, players, game_id))
-                    return games, None
+            while True:
+                event = await queue.get()
+                if event is None:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                yield event
+        finally:
+            if queue in self.queues:
+                self.queues.remove(queue)
+            # Nobody is listening any more: stop the upstream work
+            if not self.queues and not self.done:
+                self.cancelled = True
+                self.task.cancel()
+
+def single_flight_stream(key_func, snapshots=False):
+    """
+    single_flight for async generators: callers whose key matches an
+    in-flight run subscribe to it instead of starting their own. A late
+    subscriber first replays the events so far (only the latest one when
+    each event replaces the previous, snapshots=True), then follows live.
+    The run is cancelled once its last subscriber stops listening.
+    """
+    def decorator(func):
+        in_flight = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+            flight = in_flight.get(key)
+            if flight is None or flight.cancelled:
+                flight = in_flight[key] = StreamFlight(func(*args, **kwargs), snapshots)
+                flight.task.add_done_callback(
+                    lambda t, f=flight: in_flight.pop(key, None) if in_flight.get(key) is f else None)
+            async with contextlib.aclosing(flight.subscribe()) as events:
+                async for event in events:
+                    yield event
+        return wrapper
+    return decorator
+
+# Discord Bot client
+class ScriptSearchBot(commands.Bot):
+    async def setup_hook(self):
+        # Runs before connecting: warm the game cache and index from disk
+        try:
+            loaded = await asyncio.to_thread(game_list_cache.load, GAME_CACHE_SNAPSHOT_PATH)
+            if loaded:
+                index = rebuild_game_index()
+                print(f"[GameIndex] Warm-loaded {loaded} game lists, {len(index.games) if index else 0} games")
         except Exception as e:
-            print(f"[roproxy] Attempt {attempt+1} failed: {e}")
-            await asyncio.sleep(1)
-    return [], "roproxy: Failed after 3 attempts or network error."
+            print(f"[GameIndex] Could not load {GAME_CACHE_SNAPSHOT_PATH}: {e}")
+        # Its first pass loads today's quota usage before any command runs
+        start_background_task("quota_sync", quota_sync_loop)
+        mark_startup("caches")
 
-async def fetch_roblox_games_discover():
-    url = "https://www.roblox.com/discover"
-    for attempt in range(3):
+    async def close(self):
+        for task in background_tasks.values():
+            task.cancel()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        print(f"[roblox.com/discover] HTTP status: {resp.status}")
-                        await asyncio.sleep(1)
-                        continue
-                    html = await resp.text()
-                    break
+            game_list_cache.save(GAME_CACHE_SNAPSHOT_PATH)
         except Exception as e:
-            print(f"[roblox.com/discover] Attempt {attempt+1} failed: {e}")
-            await asyncio.sleep(1)
-    else:
-        return [], "roblox.com/discover: Failed after 3 attempts."
-    soup = BeautifulSoup(html, "html.parser")
+            print(f"[GameIndex] Could not save {GAME_CACHE_SNAPSHOT_PATH}: {e}")
+        await close_http_session()
+        result_cache.close()
+        quota_store.save()
+        if job_queue is not None:
+            job_queue.close()
+        await super().close()
+
+intents = discord.Intents.default()
+bot = ScriptSearchBot(command_prefix="/", intents=intents)
+
+# --- HTML Scraping Helpers ---
+# Targeted scan for the few anchors the scrapers need, instead of building a
+# full BeautifulSoup tree per page. Run it via asyncio.to_thread so parsing
+# big result pages doesn't stall the event loop (and Discord heartbeats).
+ANCHOR_RE = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+HREF_RE = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]*>")
+VIDEO_LINK_PATTERNS = ("youtube.com/watch",)
+SCRIPT_LINK_PATTERNS = ("youtube.com/watch", "pastebin.com/")
+
+def extract_links(html, patterns):
+    # (href, text) for every <a href> whose href contains one of patterns
+    if not any(p in html for p in patterns):
+        return []
+    links = []
+    for match in ANCHOR_RE.finditer(html):
+        attrs = match.group(1)
+        if not any(p in attrs for p in patterns):
+            continue
+        href_match = HREF_RE.search(attrs)
+        if not href_match:
+            continue
+        href = html_lib.unescape(next(g for g in href_match.groups() if g is not None))
+        if not any(p in href for p in patterns):
+            continue
+        text = " ".join(html_lib.unescape(TAG_RE.sub(" ", match.group(2))).split())
+        links.append((href, text))
+    return links
+
+def parse_discover_games(html):
+    # Only game cards are parsed into a tree. bs4 is imported on first use:
+    # no other source needs it, so startup doesn't pay for it
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("div", class_="game-card-container"))
     games = []
     for div in soup.find_all("div", class_="game-card-container"):
         name_tag = div.find("span", class_="game-card-name")
@@ -142,276 +769,1416 @@ async def fetch_roblox_games_discover():
                     games.append((name, players, game_id))
             except ValueError:
                 continue
+    return games
+
+def scored_links(html, patterns, search_words, source):
+    # Scrape matching links whose text mentions a script, scored for ranking
+    results = []
+    for href, text in extract_links(html, patterns):
+        lowered = text.lower()
+        if "script" not in lowered:
+            continue
+        score = smart_video_score(lowered, '', '', search_words or [])
+        results.append(VideoCandidate(score, text or href, href, source))
+    return results
+
+# --- Roblox Game Search Functions ---
+def smart_match(game_name: str, keywords: List[str]) -> bool:
+    name = game_name.lower()
+    return all(any(kw in word for word in name.split()) or kw in name for kw in keywords)
+
+class GameDetailsParser:
+    """
+    Incremental parser for the `var game_details = {...};` object on the
+    Rolimons gametable page. Text is fed in chunks as it downloads; each
+    "id": [name, ?, ?, players, ...] entry is decoded on its own and kept only
+    if it has at least min_players, so neither the page nor the whole object
+    is ever held in memory.
+    """
+    MARKER = "var game_details = "
+    MAX_PENDING = 1 << 20  # an unfinished entry longer than this is malformed
+
+    def __init__(self, min_players):
+        self.min_players = min_players
+        self.games = []
+        self.found = False
+        self.done = False
+        self.error = None
+        self._opened = False
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        if self.done or self.error:
+            return
+        buf = self._buffer + text
+        if not self.found:
+            idx = buf.find(self.MARKER)
+            if idx < 0:
+                # Keep just enough to catch a marker split across chunks
+                self._buffer = buf[-(len(self.MARKER) - 1):]
+                return
+            self.found = True
+            buf = buf[idx + len(self.MARKER):]
+        if not self._opened:
+            buf = buf.lstrip()
+            if not buf:
+                self._buffer = ""
+                return
+            if buf[0] != "{":
+                self.error = "game_details is not an object"
+                return
+            self._opened = True
+            buf = buf[1:]
+        self._buffer = buf[self._parse_entries(buf):]
+        if not self.done and len(self._buffer) > self.MAX_PENDING:
+            self.error = "unterminated entry"
+            self._buffer = ""
+
+    def _parse_entries(self, buf):
+        # Returns how much of buf was consumed; the rest waits for more text
+        pos = 0
+        n = len(buf)
+        while True:
+            while pos < n and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= n:
+                return pos
+            if buf[pos] == "}":
+                self.done = True
+                return pos + 1
+            try:
+                game_id, end = self._decoder.raw_decode(buf, pos)
+                end = self._skip_space(buf, end)
+                if end >= n:
+                    return pos
+                if buf[end] != ":":
+                    self.error = f"expected ':' after {game_id!r}"
+                    return pos
+                end = self._skip_space(buf, end + 1)
+                entry, end = self._decoder.raw_decode(buf, end)
+            except json.JSONDecodeError:
+                return pos  # incomplete entry
+            if end >= n:
+                return pos  # a value ending exactly at the chunk edge may be cut short
+            pos = end
+            try:
+                name = entry[0]
+                players = entry[3]
+                if players >= self.min_players:
+                    self.games.append((name, players, game_id))
+            except Exception as e:
+                print(f"[Rolimons] Error parsing entry: {e}")
+
+    @staticmethod
+    def _skip_space(buf, pos):
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+async def fetch_roblox_games_rolimons():
+    url = ROLIMONS_URL
+
+    async def attempt():
+        async with get_http_session().get(url) as resp:
+            check_status(resp)
+            # Parse game_details while the page streams in and stop
+            # reading as soon as the object is complete
+            parser = GameDetailsParser(ROBLOX_MIN_PLAYERS)
+            decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+            async for chunk in resp.content.iter_chunked(ROLIMONS_CHUNK_SIZE):
+                parser.feed(decoder.decode(chunk))
+                if parser.done or parser.error:
+                    break
+            else:
+                parser.feed(decoder.decode(b"", final=True))
+            return parser
+
+    parser, error = await fetch_with_retry("Rolimons", attempt)
+    if error:
+        return [], error
+    if not parser.found:
+        print("[Rolimons] Could not find game_details JS variable.")
+        return [], "Could not find game_details on Rolimons. The site structure may have changed."
+    if not parser.done:
+        error = parser.error or "object ended early"
+        print(f"[Rolimons] Error parsing game_details: {error}")
+        return [], f"Error parsing game_details: {error}"
+    return parser.games, None
+
+async def fetch_roblox_games_roproxy():
+    url = f"{ROPROXY_GAMES_URL}?sortToken=&sortOrder=Asc&limit=20"
+
+    async def attempt():
+        async with get_http_session().get(url) as resp:
+            check_status(resp)
+            data = await resp.json()
+        games = []
+        for g in data.get("data", []):
+            name = g.get("name")
+            players = g.get("playing", 0)
+            game_id = str(g.get("id")) if g.get("id") else None
+            if name and players >= ROBLOX_MIN_PLAYERS and game_id:
+                games.append((name, players, game_id))
+        return games
+
+    games, error = await fetch_with_retry("roproxy", attempt)
+    return games or [], error
+
+async def fetch_roblox_games_discover():
+    url = ROBLOX_DISCOVER_URL
+
+    async def attempt():
+        async with get_http_session().get(url) as resp:
+            check_status(resp)
+            return await resp.text()
+
+    html, error = await fetch_with_retry("roblox.com/discover", attempt)
+    if error:
+        return [], error
+    games = await asyncio.to_thread(parse_discover_games, html)
     return games, None
 
 async def fetch_roblox_games_explore_api():
     session_id = str(uuid.uuid4())
-    url = f"https://apis.roblox.com/explore-api/v1/get-sorts?sessionId={session_id}&device=computer&country=all"
-    for attempt in range(3):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        print(f"[explore-api] HTTP status: {resp.status}")
-                        await asyncio.sleep(1)
-                        continue
-                    data = await resp.json()
-                    games = []
-                    for sort in data.get("sorts", []):
-                        for entry in sort.get("entries", []):
-                            name = entry.get("name")
-                            players = entry.get("playing", 0)
-                            game_id = str(entry.get("id")) if entry.get("id") else None
-                            if name and players >= ROBLOX_MIN_PLAYERS and game_id:
-                                games.append((name, players, game_id))
-                    return games, None
-        except Exception as e:
-            print(f"[explore-api] Attempt {attempt+1} failed: {e}")
-            await asyncio.sleep(1)
-    return [], "explore-api: Failed after 3 attempts or network error."
+    url = f"{ROBLOX_APIS_BASE}/explore-api/v1/get-sorts?sessionId={session_id}&device=computer&country=all"
+
+    async def attempt():
+        async with get_http_session().get(url) as resp:
+            check_status(resp)
+            data = await resp.json()
+        games = []
+        for sort in data.get("sorts", []):
+            for entry in sort.get("entries", []):
+                name = entry.get("name")
+                players = entry.get("playing", 0)
+                game_id = str(entry.get("id")) if entry.get("id") else None
+                if name and players >= ROBLOX_MIN_PLAYERS and game_id:
+                    games.append((name, players, game_id))
+        return games
+
+    games, error = await fetch_with_retry("explore-api", attempt)
+    return games or [], error
 
 async def fetch_roblox_games_search_api():
     session_id = str(uuid.uuid4())
-    url = f"https://apis.roblox.com/search-api/omni-search?searchQuery=roblox&sessionId={session_id}"
-    for attempt in range(3):
+    url = f"{ROBLOX_APIS_BASE}/search-api/omni-search?searchQuery=roblox&sessionId={session_id}"
+
+    async def attempt():
+        async with get_http_session().get(url) as resp:
+            check_status(resp)
+            data = await resp.json()
+        games = []
+        for g in data.get("games", []):
+            name = g.get("name")
+            players = g.get("playing", 0)
+            game_id = str(g.get("id")) if g.get("id") else None
+            if name and players >= ROBLOX_MIN_PLAYERS and game_id:
+                games.append((name, players, game_id))
+        return games
+
+    games, error = await fetch_with_retry("search-api", attempt)
+    return games or [], error
+
+class GameListCache:
+    """
+    In-process cache of each game source's parsed (name, players, game_id)
+    list with TTL, stale-while-revalidate and bounded size. Concurrent misses
+    for the same source share one fetch.
+    """
+    def __init__(self, ttl, stale_ttl, max_games, max_sources):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_games = max_games
+        self.max_sources = max_sources
+        self.entries = OrderedDict()  # label -> (fetched_at, games)
+        self.refreshing = {}  # label -> in-flight fetch task
+
+    async def get(self, label, fetcher):
+        entry = self.entries.get(label)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.entries.move_to_end(label)
+                cache_requests.inc("games", label, "hit")
+                return entry[1], None
+            if age < self.ttl + self.stale_ttl:
+                self.entries.move_to_end(label)
+                self._refresh(label, fetcher)
+                cache_requests.inc("games", label, "stale")
+                return entry[1], None
+        cache_requests.inc("games", label, "miss")
+        # Shielded so a cancelled caller doesn't abort a fetch others may use
+        return await asyncio.shield(self._refresh(label, fetcher))
+
+    def _refresh(self, label, fetcher):
+        task = self.refreshing.get(label)
+        if task is None:
+            task = asyncio.create_task(self._load(label, fetcher))
+            self.refreshing[label] = task
+        return task
+
+    async def _load(self, label, fetcher):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        print(f"[search-api] HTTP status: {resp.status}")
-                        await asyncio.sleep(1)
-                        continue
-                    data = await resp.json()
-                    games = []
-                    for g in data.get("games", []):
-                        name = g.get("name")
-                        players = g.get("playing", 0)
-                        game_id = str(g.get("id")) if g.get("id") else None
-                        if name and players >= ROBLOX_MIN_PLAYERS and game_id:
-                            games.append((name, players, game_id))
-                    return games, None
+            games, error = await fetcher()
         except Exception as e:
-            print(f"[search-api] Attempt {attempt+1} failed: {e}")
-            await asyncio.sleep(1)
-    return [], "search-api: Failed after 3 attempts or network error."
+            games, error = [], str(e)
+        finally:
+            self.refreshing.pop(label, None)
+        if games:
+            if len(games) > self.max_games:
+                games = sorted(games, key=lambda g: g[1], reverse=True)[:self.max_games]
+            self.entries[label] = (time.monotonic(), games)
+            self.entries.move_to_end(label)
+            while len(self.entries) > self.max_sources:
+                self.entries.popitem(last=False)
+        elif label in self.entries:
+            print(f"[{label}] Refresh failed, keeping cached list: {error}")
+        return games, error
 
-async def fetch_popular_roblox_games_smart(search: str, max_games: int):
+    def snapshot(self):
+        # {label: games} for every entry that may still be served
+        now = time.monotonic()
+        return {
+            label: games for label, (fetched_at, games) in self.entries.items()
+            if now - fetched_at < self.ttl + self.stale_ttl
+        }
+
+    def clear(self):
+        self.entries.clear()
+
+    def save(self, path):
+        # Servable entries with wall-clock fetch times (monotonic ones don't
+        # survive a restart)
+        now, wall = time.monotonic(), time.time()
+        data = {
+            label: {"fetched_at": wall - (now - fetched_at), "games": games}
+            for label, (fetched_at, games) in self.entries.items()
+            if now - fetched_at < self.ttl + self.stale_ttl
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        # Entries from save() that may still be served; they come back with
+        # their original age, so old ones are refreshed on first use
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        now, wall = time.monotonic(), time.time()
+        loaded = 0
+        for label, entry in data.items():
+            age = max(0.0, wall - entry["fetched_at"])
+            if age < self.ttl + self.stale_ttl and label not in self.entries:
+                self.entries[label] = (now - age, [tuple(game) for game in entry["games"]])
+                loaded += 1
+        return loaded
+
+game_list_cache = GameListCache(GAME_CACHE_TTL, GAME_CACHE_STALE_TTL, GAME_CACHE_MAX_GAMES, GAME_CACHE_MAX_SOURCES)
+
+GAME_SOURCES = [
+    (fetch_roblox_games_rolimons, "Rolimons"),
+    (fetch_roblox_games_roproxy, "roproxy"),
+    (fetch_roblox_games_discover, "Roblox Discover"),
+    (fetch_roblox_games_explore_api, "Explore API"),
+    (fetch_roblox_games_search_api, "Search API")
+]
+
+class GameIndex:
+    """
+    Keyword index over the game catalog. Games are deduplicated by name and
+    sorted by player count; each name token maps to the positions of the games
+    containing it, and a trigram map over tokens answers substring lookups
+    (the same matching smart_match does).
+    """
+    def __init__(self, games, sources, built_at=None):
+        best = {}
+        for name, players, game_id in games:
+            if name not in best or players > best[name][1]:
+                best[name] = (name, players, game_id)
+        self.games = sorted(best.values(), key=lambda g: g[1], reverse=True)
+        self.sources = sources
+        # As old as its oldest list, so an index over stale lists isn't trusted
+        self.built_at = time.monotonic() if built_at is None else built_at
+        self.postings = {}  # token -> positions in self.games (ascending = most players first)
+        for pos, (name, _, _) in enumerate(self.games):
+            for token in set(name.lower().split()):
+                self.postings.setdefault(token, []).append(pos)
+        self.trigrams = {}  # trigram -> tokens containing it
+        for token in self.postings:
+            for i in range(len(token) - 2):
+                self.trigrams.setdefault(token[i:i + 3], set()).add(token)
+        self._keyword_positions = {}
+
+    def _positions(self, kw):
+        positions = self._keyword_positions.get(kw)
+        if positions is not None:
+            return positions
+        if len(kw) >= 3:
+            tokens = None
+            for i in range(len(kw) - 2):
+                with_gram = self.trigrams.get(kw[i:i + 3], ())
+                tokens = set(with_gram) if tokens is None else tokens.intersection(with_gram)
+                if not tokens:
+                    break
+            tokens = [t for t in tokens if kw in t]
+        else:
+            # Too short for trigrams: scan the (small) token vocabulary
+            tokens = [t for t in self.postings if kw in t]
+        positions = set()
+        for token in tokens:
+            positions.update(self.postings[token])
+        if len(self._keyword_positions) >= 1024:
+            self._keyword_positions.clear()
+        self._keyword_positions[kw] = positions
+        return positions
+
+    def search(self, keywords, limit):
+        # Top `limit` games (by players) whose name matches every keyword
+        if not keywords:
+            return self.games[:limit]
+        matches = None
+        for positions in sorted((self._positions(kw) for kw in keywords), key=len):
+            matches = set(positions) if matches is None else matches & positions
+            if not matches:
+                return []
+        return [self.games[pos] for pos in heapq.nsmallest(limit, matches)]
+
+game_index = None
+
+def rebuild_game_index():
+    global game_index
+    snapshot = game_list_cache.snapshot()
+    # Leave out lists too old to trust, so one stale source (e.g. down since
+    # the last refresh) doesn't age the index past GAME_INDEX_MAX_AGE
+    now = time.monotonic()
+    sources = [
+        label for _, label in GAME_SOURCES
+        if label in snapshot and now - game_list_cache.entries[label][0] < GAME_INDEX_MAX_AGE
+    ]
+    games = [game for label in sources for game in snapshot[label]]
+    if games:
+        oldest = min(game_list_cache.entries[label][0] for label in sources)
+        game_index = GameIndex(games, sources, built_at=oldest)
+    return game_index
+
+async def refresh_game_index_loop():
+    # Keep every source's cached list warm and rebuild the index from it
+    while True:
+        try:
+            await asyncio.gather(*(game_list_cache.get(label, fetcher) for fetcher, label in GAME_SOURCES))
+            # Stale lists (e.g. warm-loaded from disk) were served as they are
+            # and are refreshing now; index the fresh ones
+            await asyncio.gather(*list(game_list_cache.refreshing.values()), return_exceptions=True)
+            index = rebuild_game_index()
+            if index is not None:
+                print(f"[GameIndex] Rebuilt with {len(index.games)} games from {', '.join(index.sources)}")
+                await asyncio.to_thread(game_list_cache.save, GAME_CACHE_SNAPSHOT_PATH)
+        except Exception as e:
+            print(f"[GameIndex] Rebuild failed: {e}")
+        await asyncio.sleep(GAME_INDEX_REFRESH)
+
+@single_flight_stream(lambda search, max_games: (normalize_query(search), max_games))
+async def stream_roblox_games(search: str, max_games: int):
+    """
+    Yields ("games", source, new_games) each time a source (or the keyword
+    index) adds matching games, in arrival order and at most max_games in
+    total, then ("games_done", error, sources). error is only set when no
+    game was found.
+    """
     sources = []
     errors = []
-    all_games = []
+    found = 0
     seen = set()
     kw_list = [k.lower() for k in search.split() if k.strip()]
-    for fetcher, label in [
-        (fetch_roblox_games_rolimons, "Rolimons"),
-        (fetch_roblox_games_roproxy, "roproxy"),
-        (fetch_roblox_games_discover, "Roblox Discover"),
-        (fetch_roblox_games_explore_api, "Explore API"),
-        (fetch_roblox_games_search_api, "Search API")
-    ]:
-        games, error = await fetcher()
+    # Answer from the keyword index when it is recent enough
+    index = game_index
+    if index is not None and time.monotonic() - index.built_at < GAME_INDEX_MAX_AGE:
+        games = index.search(kw_list, max_games)
         if games:
-            sources.append(label)
-            for name, players, game_id in games:
-                if name not in seen and (not kw_list or smart_match(name, kw_list)):
-                    all_games.append((name, players, game_id))
-                    seen.add(name)
-        elif error:
-            errors.append(f"{label}: {error}")
-        if len(all_games) >= max_games:
-            break
+            yield "games", "index", games
+            yield "games_done", None, index.sources
+            return
+    # Query every source at once and merge results in arrival order
+    tasks = {asyncio.create_task(game_list_cache.get(label, fetcher)): label for fetcher, label in GAME_SOURCES}
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + GAME_SOURCES_DEADLINE
+    try:
+        while pending and found < max_games:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                label = tasks[task]
+                try:
+                    games, error = task.result()
+                except Exception as e:
+                    games, error = [], str(e)
+                if games:
+                    sources.append(label)
+                    new_games = []
+                    for name, players, game_id in games:
+                        if found + len(new_games) >= max_games:
+                            break
+                        if name not in seen and (not kw_list or smart_match(name, kw_list)):
+                            new_games.append((name, players, game_id))
+                            seen.add(name)
+                    if new_games:
+                        found += len(new_games)
+                        yield "games", label, new_games
+                elif error:
+                    errors.append(f"{label}: {error}")
+    finally:
+        # Enough games (or out of time): drop the stragglers
+        for task in pending:
+            task.cancel()
+    if pending and found < max_games:
+        for task in pending:
+            errors.append(f"{tasks[task]}: Timed out after {GAME_SOURCES_DEADLINE:g}s.")
+    if not found:
+        yield "games_done", "\n".join(errors) or "No games found.", sources
+    else:
+        yield "games_done", None, sources
+
+async def fetch_popular_roblox_games_smart(search: str, max_games: int):
+    all_games = []
+    async with contextlib.aclosing(stream_roblox_games(search, max_games)) as stream:
+        async for event in stream:
+            if event[0] == "games":
+                all_games.extend(event[2])
+            else:
+                _, error, sources = event
     if not all_games:
-        return None, "\n".join(errors) or "No games found.", sources
-    return all_games[:max_games], None, sources
+        return None, error, sources
+    return all_games, None, sources
 
 # --- Video Search APIs ---
+YOUTUBE_ID_RE = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:[^#]*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+
+def video_key(link):
+    # Identity of a result link: "youtube:<id>" for any YouTube URL variant
+    # (watch, youtu.be, shorts, m./music. hosts, extra params), otherwise the
+    # link without scheme, "www.", fragment and trailing slash
+    if not link:
+        return ""
+    match = YOUTUBE_ID_RE.search(link)
+    if match:
+        return "youtube:" + match.group(1)
+    host, _, rest = link.split("#", 1)[0].split("://", 1)[-1].partition("/")
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}/{rest}".rstrip("/")
+
+class VideoCandidate:
+    """
+    One scored result. Ordering is by rank: a < b when a ranks below b
+    (lower score, or on a score tie the larger key), so ties resolve the
+    same way whatever order providers answered in.
+    """
+    __slots__ = ("score", "title", "link", "key", "source")
+
+    def __init__(self, score, title, link, source):
+        self.score = score
+        self.title = title
+        self.link = link
+        self.key = video_key(link)
+        self.source = source
+
+    def __lt__(self, other):
+        if self.score != other.score:
+            return self.score < other.score
+        return self.key > other.key
+
+    def __repr__(self):
+        return f"VideoCandidate({self.score:.3f}, {self.title!r}, {self.link!r}, {self.source!r})"
+
+    def to_json(self):
+        return [self.score, self.title, self.link, self.source]
+
+    @classmethod
+    def from_json(cls, row):
+        return cls(*row)
+
+class TopK:
+    """
+    The best `limit` candidates seen so far, one per video key, in a min-heap
+    of size ~limit instead of a list of everything sorted at the end. A
+    repeated key keeps its best-scored candidate; replaced entries are left
+    in the heap and skipped lazily.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.kept = {}  # key -> candidate
+        self.heap = []  # kept candidates (plus stale ones), worst on top
+
+    def push(self, candidate):
+        # True when the candidate made it into the top `limit`
+        key = candidate.key
+        score = candidate.score
+        if not key or self.limit <= 0:
+            return False
+        current = self.kept.get(key)
+        if current is not None:
+            if score <= current.score:
+                return False
+        elif len(self.kept) >= self.limit:
+            # Most candidates lose to the current worst; compare inline
+            worst = self.heap[0]
+            if self.kept.get(worst.key) is not worst:
+                self._drop_stale()
+                worst = self.heap[0]
+            if score < worst.score or (score == worst.score and key >= worst.key):
+                return False
+            del self.kept[heapq.heappop(self.heap).key]
+        self.kept[key] = candidate
+        heapq.heappush(self.heap, candidate)
+        if len(self.heap) > 2 * self.limit + 16:
+            self.heap = list(self.kept.values())
+            heapq.heapify(self.heap)
+        return True
+
+    def extend(self, candidates):
+        for candidate in candidates:
+            self.push(candidate)
+
+    def _drop_stale(self):
+        while self.kept.get(self.heap[0].key) is not self.heap[0]:
+            heapq.heappop(self.heap)
+
+    def full_above(self, threshold):
+        # True when all `limit` slots hold a candidate scoring >= threshold
+        return len(self.kept) >= self.limit and all(c.score >= threshold for c in self.kept.values())
+
+    def ranked(self):
+        return sorted(self.kept.values(), reverse=True)
+
+def normalize_query(text):
+    # Lowercase, collapse whitespace and drop repeated words so that
+    # "Blox Fruits blox fruits script" and "blox fruits script" share a key
+    words = []
+    for word in text.lower().split():
+        if word not in words:
+            words.append(word)
+    return " ".join(words)
+
+class SQLiteCacheBackend:
+    """
+    Result cache storage in a local SQLite file (WAL mode), so every process
+    on the host can share it. Entries expire after ttl; past max_entries the
+    least recently read are evicted. Methods block; ResultCache runs them in
+    a worker thread.
+    """
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_results ("
+                "provider TEXT NOT NULL, query TEXT NOT NULL, results TEXT NOT NULL, "
+                "max_results INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "PRIMARY KEY (provider, query))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS video_results_accessed ON video_results (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self, provider, query):
+        # (results JSON, max_results it was stored for), or None
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT results, max_results, created_at FROM video_results WHERE provider = ? AND query = ?",
+                (provider, query)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > self.ttl:
+                conn.execute("DELETE FROM video_results WHERE provider = ? AND query = ?", (provider, query))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE video_results SET accessed_at = ? WHERE provider = ? AND query = ?",
+                (now, provider, query)
+            )
+            conn.commit()
+            return row[0], row[1]
+
+    def store(self, provider, query, payload, max_results):
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO video_results VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, query, payload, max_results, now, now)
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM video_results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM video_results WHERE rowid IN "
+                    "(SELECT rowid FROM video_results ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM video_results")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class MemoryCacheBackend:
+    # Same interface as SQLiteCacheBackend, kept in this process only
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (provider, query) -> (payload, max_results, created_at)
+        self._lock = threading.Lock()
+
+    def load(self, provider, query):
+        with self._lock:
+            entry = self.entries.get((provider, query))
+            if entry is None:
+                return None
+            if time.time() - entry[2] > self.ttl:
+                del self.entries[(provider, query)]
+                return None
+            self.entries.move_to_end((provider, query))
+            return entry[0], entry[1]
+
+    def store(self, provider, query, payload, max_results):
+        with self._lock:
+            self.entries[(provider, query)] = (payload, max_results, time.time())
+            self.entries.move_to_end((provider, query))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def close(self):
+        pass
+
+CACHE_BACKENDS = {
+    "sqlite": lambda: SQLiteCacheBackend(RESULT_CACHE_PATH, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES),
+    "memory": lambda: MemoryCacheBackend(RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES),
+}
+
+def make_cache_backend(name):
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown RESULT_CACHE_BACKEND {name!r} (expected one of: {', '.join(CACHE_BACKENDS)})")
+    return CACHE_BACKENDS[name]()
+
+class ResultCache:
+    """
+    Provider results keyed by (provider, normalized query) in a storage
+    backend (see CACHE_BACKENDS); hits and misses are counted in
+    cache_requests. Blocking backend calls run in a worker thread.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _get(self, provider, query, limit):
+        entry = self.backend.load(provider, query)
+        if entry is None:
+            return None
+        payload, max_results = entry
+        results = [VideoCandidate.from_json(r) for r in json.loads(payload)]
+        # A shorter stored list only answers a bigger request if the
+        # provider had nothing more to give at the time
+        if limit > max_results and len(results) >= max_results:
+            return None
+        return results[:limit]
+
+    def _put(self, provider, query, results, limit):
+        self.backend.store(provider, query, json.dumps([r.to_json() for r in results]), limit)
+
+    async def get(self, provider, query, limit):
+        try:
+            results = await asyncio.to_thread(self._get, provider, query, limit)
+        except Exception as e:
+            print(f"[ResultCache] Read failed: {e}")
+            results = None
+        cache_requests.inc("results", provider, "miss" if results is None else "hit")
+        return results
+
+    async def put(self, provider, query, results, limit):
+        try:
+            await asyncio.to_thread(self._put, provider, query, results, limit)
+        except Exception as e:
+            print(f"[ResultCache] Write failed: {e}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def close(self):
+        self.backend.close()
+
+result_cache = ResultCache(make_cache_backend(RESULT_CACHE_BACKEND))
+
+# Set by ProviderScheduler._timed so it can tell cache hits from upstream calls
+cache_served = contextvars.ContextVar("cache_served", default=None)
+
+# Set by cached_provider for one provider pass; marked when the pass was cut
+# short (deadline, quota, 429, breaker, failed request)
+pass_status = contextvars.ContextVar("pass_status", default=None)
+
+def mark_pass_incomplete():
+    status = pass_status.get()
+    if status is not None:
+        status["complete"] = False
+
+def cached_provider(provider):
+    # Serve a provider's ranked results from result_cache; only non-empty
+    # results of complete passes are stored, so anything cut short by a
+    # transient failure is retried next time
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(game_name, search_words=None, limit=1):
+            query = normalize_query(game_name)
+            results = await result_cache.get(provider, query, limit)
+            if results is not None:
+                served = cache_served.get()
+                if served is not None:
+                    served["hit"] = True
+                return results
+            status = {"complete": True}
+            token = pass_status.set(status)
+            try:
+                results = await func(game_name, search_words, limit)
+            finally:
+                pass_status.reset(token)
+            if results and status["complete"]:
+                await result_cache.put(provider, query, results, limit)
+            return results
+        return wrapper
+    return decorator
+
+CLICKBAIT_WORDS = ["scam", "fake", "virus", "robux generator", "free robux"]
+
+class QueryFeatures:
+    # Per-query data reused for every candidate scored against it
+    __slots__ = ("words", "lengths")
+
+    def __init__(self, search_words):
+        self.words = list(search_words)
+        self.lengths = [len(w) for w in self.words]
+
+@functools.lru_cache(maxsize=256)
+def query_features(search_words):
+    return QueryFeatures(search_words)
+
+def fuzzy_similarity(features, field):
+    # Sum over search words of an approximation of
+    # SequenceMatcher(None, word, field).ratio() = 2 * matched / (len(word) + len(field)),
+    # where matched is the whole word on a substring hit, otherwise the number
+    # of the word's characters found in order in field (greedy, via str.find)
+    total = 0.0
+    field_len = len(field)
+    if not field_len:
+        return total
+    for word, length in zip(features.words, features.lengths):
+        if word in field:
+            matched = length
+        else:
+            matched = 0
+            pos = 0
+            for ch in word:
+                found = field.find(ch, pos)
+                if found >= 0:
+                    matched += 1
+                    pos = found + 1
+        total += 2.0 * matched / (length + field_len)
+    return total
+
+def score_videos(videos, search_words):
+    """
+    Score a batch of (title, desc, tags, published) candidates against
+    search_words: keyword match, fuzzy match, recency bonus and clickbait
+    penalty. Query features and date cut-offs are computed once per batch.
+    """
+    features = query_features(tuple(search_words))
+    now = datetime.now()
+    half_year_ago = now - timedelta(days=180)
+    year_ago = now - timedelta(days=365)
+    scores = []
+    for title, desc, tags, published in videos:
+        score = 0.0
+        text = f"{title} {desc} {tags}".lower()
+        # Keyword match
+        for word in features.words:
+            if word in text:
+                score += 1.0
+        # Fuzzy match
+        for field in (title, desc, tags):
+            score += fuzzy_similarity(features, field)
+        # Recency bonus (if published date available)
+        if published:
+            try:
+                pub_date = datetime.strptime(published[:10], "%Y-%m-%d")
+                if pub_date > half_year_ago:
+                    score += 1.5  # Bonus for last 6 months
+                elif pub_date > year_ago:
+                    score += 0.5  # Bonus for last year
+            except Exception:
+                pass
+        # Penalize clickbait/unwanted words
+        for bad in CLICKBAIT_WORDS:
+            if bad in text:
+                score -= 2.0
+        scores.append(score)
+    return scores
+
 def smart_video_score(title, desc, tags, search_words, published=None):
     # Score based on keyword match, fuzzy match, recency, and penalize clickbait
-    score = 0.0
-    text = f"{title} {desc} {tags}".lower()
-    # Keyword match
-    for word in search_words:
-        if word in text:
-            score += 1.0
-    # Fuzzy match
-    for word in search_words:
-        for field in [title, desc, tags]:
-            score += SequenceMatcher(None, word, field).ratio()
-    # Recency bonus (if published date available)
-    if published:
+    return score_videos([(title, desc, tags, published)], search_words)[0]
+
+SCRIPT_QUERY_TEMPLATES = [
+    "{} script",
+    "script for {}",
+    "{} hack script",
+    "{} exploit",
+    "{} pastebin",
+    "{} working script",
+    "{} gui",
+    "{} auto farm",
+    "{} loadstring",
+    "{} op script",
+    "{} injector",
+    "{} undetected script",
+    "{} no key script",
+    "{} 2024 script",
+    "{} latest script"
+]
+
+def script_queries(game_name):
+    # Expanded query variations
+    return [t.format(game_name) for t in SCRIPT_QUERY_TEMPLATES]
+
+class FairSemaphore:
+    """
+    Semaphore whose waiters queue per guild (current_guild) and get freed
+    slots round-robin, like RateLimiter's waiters, so one guild's burst
+    can't hold every slot while others wait behind it.
+    """
+    def __init__(self, limit):
+        self.free = limit
+        self.waiters = OrderedDict()  # guild -> deque of futures, in turn order
+
+    async def acquire(self):
+        if self.free > 0 and not self.waiters:
+            self.free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(current_guild.get(), deque()).append(future)
         try:
-            pub_date = datetime.strptime(published[:10], "%Y-%m-%d")
-            if pub_date > datetime.now() - timedelta(days=180):
-                score += 1.5  # Bonus for last 6 months
-            elif pub_date > datetime.now() - timedelta(days=365):
-                score += 0.5  # Bonus for last year
-        except Exception:
-            pass
-    # Penalize clickbait/unwanted words
-    for bad in ["scam", "fake", "virus", "robux generator", "free robux"]:
-        if bad in text:
-            score -= 2.0
-    return score
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # a slot was handed over as we gave up
+            raise
+
+    def release(self):
+        while self.waiters:
+            guild, queue = next(iter(self.waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(guild)
+            else:
+                del self.waiters[guild]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+# Semaphores are shared by every command so limits hold bot-wide
+# (keyed by event loop: a semaphore cannot be awaited from another loop)
+shared_semaphores = {}
+
+def get_shared_semaphore(label, limit):
+    loop = asyncio.get_running_loop()
+    entry = shared_semaphores.get(label)
+    if entry is None or entry[0] is not loop:
+        entry = shared_semaphores[label] = (loop, FairSemaphore(limit))
+    return entry[1]
+
+# When set (by the prefetcher), counts the quota units spent on metered
+# search APIs in this context, including tasks it spawns
+api_unit_meter = contextvars.ContextVar("api_unit_meter", default=None)
+
+def count_api_units(units=1):
+    meter = api_unit_meter.get()
+    if meter is not None:
+        meter["units"] += units
+
+# --- Outbound rate limits and quotas ---
+# Who the current request is for, so rate limiters can share fairly
+current_guild = contextvars.ContextVar("current_guild", default=None)
+
+class RateLimiter:
+    """
+    Token bucket shared by every request to one provider or host. Requests
+    that have to wait queue per guild and are served round-robin, so one
+    guild's burst of queries can't starve the others. pause() empties the
+    bucket for a while, e.g. after a 429.
+    """
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiters = OrderedDict()  # guild -> deque of futures, in turn order
+        self._dispatcher = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def _take(self):
+        now = self._refill()
+        if now < self.paused_until or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def _wait_time(self):
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        return max(0.01, (1 - self.tokens) / self.rate) if self.rate > 0 else 1.0
+
+    async def acquire(self):
+        if not self.waiters and self._take():
+            return
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(current_guild.get(), deque()).append(future)
+        dispatcher = self._dispatcher
+        if dispatcher is None or dispatcher.done() or dispatcher.get_loop() is not asyncio.get_running_loop():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await future
+        finally:
+            rate_limit_wait_seconds.observe(time.monotonic() - start, self.name)
+
+    async def _dispatch(self):
+        while self.waiters:
+            if not self._take():
+                await asyncio.sleep(self._wait_time())
+                continue
+            guild, queue = next(iter(self.waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(guild)
+            else:
+                del self.waiters[guild]
+            if future.done():
+                self.tokens += 1  # waiter gave up; hand the token on
+            else:
+                future.set_result(None)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        print(f"[RateLimiter] {self.name}: paused for {seconds:.0f}s")
+
+    def snapshot(self):
+        # Read-only (called from Flask's thread)
+        tokens = min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return {
+            "tokens": round(tokens, 2),
+            "waiting": sum(len(q) for q in self.waiters.values()),
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+        }
+
+rate_limiters = {}
+
+def get_rate_limiter(name):
+    # None for sources without a configured rate
+    limiter = rate_limiters.get(name)
+    if limiter is None and name in RATE_LIMITS:
+        limiter = rate_limiters[name] = RateLimiter(name, *RATE_LIMITS[name])
+    return limiter
+
+class QuotaStore:
+    """
+    Daily quota usage per provider in a small JSON file that every process
+    using the same path adds to (search workers, restarts). Spending is
+    counted in memory; save() merges it into the file under a lock and
+    picks up what other processes spent. save() blocks, so quota_sync_loop
+    runs it in a thread every few seconds (and close() once at shutdown).
+    """
+    SYNC_INTERVAL = 5
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}  # name -> {"day", "used"} as of the last save
+        self.pending = {}  # name -> [day, units] spent here since then
+        self.saving = {}  # pending units being written by save()
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[Quota] Could not read {self.path}: {e}")
+            return {}
 
-async def search_youtube_script_searchapi(game_name, search_words=None):
+    def used(self, name, day):
+        with self._lock:
+            saved = self.state.get(name)
+            used = saved["used"] if saved and saved.get("day") == day else 0
+            for spent in (self.saving, self.pending):
+                entry = spent.get(name)
+                if entry and entry[0] == day:
+                    used += entry[1]
+            return used
+
+    def add(self, name, day, units):
+        with self._lock:
+            entry = self.pending.get(name)
+            if entry is None or entry[0] != day:
+                self.pending[name] = [day, units]
+            else:
+                entry[1] += units
+
+    def save(self):
+        with self._lock:
+            self.saving, self.pending = self.pending, {}
+            saving = self.saving
+        try:
+            with open(self.path + ".lock", "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                state = self._read()
+                if saving:
+                    for name, (day, units) in saving.items():
+                        saved = state.get(name)
+                        if saved and saved.get("day") == day:
+                            saved["used"] = saved.get("used", 0) + units
+                        else:
+                            state[name] = {"day": day, "used": units}
+                    tmp = self.path + ".tmp"
+                    with open(tmp, "w") as f:
+                        json.dump(state, f)
+                    os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[Quota] Could not write {self.path}: {e}")
+            # Keep the units for the next attempt
+            with self._lock:
+                for name, (day, units) in saving.items():
+                    entry = self.pending.get(name)
+                    if entry is None:
+                        self.pending[name] = [day, units]
+                    elif entry[0] == day:
+                        entry[1] += units
+                self.saving = {}
+            return
+        with self._lock:
+            self.state = state
+            self.saving = {}
+
+quota_store = QuotaStore(QUOTA_STATE_PATH)
+
+async def quota_sync_loop():
+    while True:
+        await asyncio.to_thread(quota_store.save)
+        await asyncio.sleep(QuotaStore.SYNC_INTERVAL)
+
+# Share of each daily quota the current context must leave unspent (set
+# for the prefetcher, so commands keep the rest)
+quota_reserve = contextvars.ContextVar("quota_reserve", default=0.0)
+
+class QuotaMeter:
+    # Daily API unit budget (0 = unlimited); resets at midnight UTC
+    def __init__(self, name, daily_limit, store):
+        self.name = name
+        self.daily_limit = daily_limit
+        self.store = store
+
+    @property
+    def used(self):
+        return self.store.used(self.name, datetime.now(timezone.utc).date().isoformat())
+
+    def try_spend(self, units):
+        today = datetime.now(timezone.utc).date().isoformat()
+        limit = self.daily_limit * (1 - quota_reserve.get())
+        if self.daily_limit and self.store.used(self.name, today) + units > limit:
+            return False
+        self.store.add(self.name, today, units)
+        return True
+
+    def exhaust(self):
+        # The upstream says the quota is gone, whatever our count says
+        today = datetime.now(timezone.utc).date().isoformat()
+        used = self.store.used(self.name, today)
+        if self.daily_limit and used < self.daily_limit:
+            self.store.add(self.name, today, self.daily_limit - used)
+            print(f"[Quota] {self.name}: marked exhausted for today")
+
+    def exhausted(self, units=1):
+        return self.remaining() < units
+
+    def remaining(self):
+        # What the current context may still spend today
+        if not self.daily_limit:
+            return float("inf")
+        return self.daily_limit * (1 - quota_reserve.get()) - self.used
+
+    def snapshot(self):
+        # Read-only (called from Flask's thread)
+        today = datetime.now(timezone.utc).date().isoformat()
+        return {"daily_limit": self.daily_limit, "used": self.store.used(self.name, today)}
+
+quota_meters = {}
+
+def get_quota(name):
+    meter = quota_meters.get(name)
+    if meter is None:
+        meter = quota_meters[name] = QuotaMeter(name, DAILY_QUOTAS.get(name, 0), quota_store)
+    return meter
+
+def provider_available(name, units=1):
+    # False once the provider's daily budget can't cover another request
+    return not get_quota(name).exhausted(units)
+
+async def run_provider_queries(label, queries, fetch_query, concurrency, results=None, query_cost=1):
+    """
+    Run fetch_query(session, q) for all queries concurrently (at most
+    `concurrency` in flight for this provider, behind its circuit breaker,
+    rate limiter and daily quota) and collect the items they produce before
+    PROVIDER_DEADLINE into `results` (a list by default, or a TopK for scored
+    candidates), which is returned. Queries still running are cancelled.
+    """
+    semaphore = get_shared_semaphore(label, concurrency)
+    breaker = get_breaker(label)
+    limiter = get_rate_limiter(label)
+    quota = get_quota(label)
+    session = get_http_session()
+    all_results = [] if results is None else results
+    skipped = []  # queries refused for lack of quota
+
+    async def run(q):
+        async with semaphore:
+            # A provider that keeps failing is skipped until its cooldown ends
+            if not breaker.allow():
+                mark_pass_incomplete()
+                return
+            if limiter is not None:
+                await limiter.acquire()
+            if not quota.try_spend(query_cost):
+                if not skipped:
+                    print(f"[{label}] Daily quota exhausted, skipping remaining queries")
+                skipped.append(q)
+                mark_pass_incomplete()
+                return
+            count_api_units(query_cost)
+            try:
+                all_results.extend(await fetch_query(session, q))
+            except RateLimitedError as e:
+                # Back off the whole provider instead of tripping its breaker
+                mark_pass_incomplete()
+                if limiter is not None:
+                    limiter.pause(e.retry_after or RATE_LIMIT_DEFAULT_PAUSE)
+            except Exception:
+                mark_pass_incomplete()
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    with upstream_source(label):
+        tasks = [asyncio.create_task(run(q)) for q in queries]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=PROVIDER_DEADLINE)
+        if pending:
+            print(f"[{label}] Deadline reached, {len(pending)}/{len(tasks)} queries unfinished")
+            mark_pass_incomplete()
+    finally:
+        for task in tasks:
+            task.cancel()
+    return all_results
+
+@cached_provider("searchapi")
+async def search_youtube_script_searchapi(game_name, search_words=None, limit=1):
     if not SEARCHAPI_IO_KEY:
-        return None
-    url = "https://www.searchapi.io/api/v1/search"
-    # Expanded query variations
-    queries = [
-        f"{game_name} script",
-        f"script for {game_name}",
-        f"{game_name} hack script",
-        f"{game_name} exploit",
-        f"{game_name} pastebin",
-        f"{game_name} working script",
-        f"{game_name} gui",
-        f"{game_name} auto farm",
-        f"{game_name} loadstring",
-        f"{game_name} op script",
-        f"{game_name} injector",
-        f"{game_name} undetected script",
-        f"{game_name} no key script",
-        f"{game_name} 2024 script",
-        f"{game_name} latest script"
-    ]
-    all_results = []
+        return []
+    url = SEARCHAPI_URL
+
+    async def fetch_query(session, q):
+        params = {
+            "engine": "youtube",
+            "q": q,
+            "api_key": SEARCHAPI_IO_KEY
+        }
+        async with session.get(url, params=params) as resp:
+            check_status(resp)
+            data = await resp.json()
+            videos = data.get("videos", [])[:15]  # Check top 15
+            batch = []
+            for v in videos:
+                title = v.get("title", "").lower()
+                desc = v.get("description", "").lower() if v.get("description") else ""
+                tags = ' '.join(v.get("keywords", [])).lower() if v.get("keywords") else ""
+                published = v.get("published", "")
+                # Must have 'script' in title, desc, or tags
+                if "script" not in title and "script" not in desc and "script" not in tags:
+                    continue
+                batch.append(((title, desc, tags, published), v))
+        scores = score_videos([fields for fields, _ in batch], search_words or [])
+        return [VideoCandidate(score, v.get("title"), v.get("link"), "searchapi") for score, (_, v) in zip(scores, batch)]
+
     try:
-        async with aiohttp.ClientSession() as session:
-            for q in queries:
-                params = {
-                    "engine": "youtube",
-                    "q": q,
-                    "api_key": SEARCHAPI_IO_KEY
-                }
-                async with session.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        continue
-                    data = await resp.json()
-                    videos = data.get("videos", [])[:15]  # Check top 15
-                    for v in videos:
-                        title = v.get("title", "").lower()
-                        desc = v.get("description", "").lower() if v.get("description") else ""
-                        tags = ' '.join(v.get("keywords", [])).lower() if v.get("keywords") else ""
-                        published = v.get("published", "")
-                        # Must have 'script' in title, desc, or tags
-                        if "script" not in title and "script" not in desc and "script" not in tags:
-                            continue
-                        score = smart_video_score(title, desc, tags, search_words or [], published)
-                        all_results.append((score, v.get("title"), v.get("link")))
-        if not all_results:
-            return None
-        all_results.sort(reverse=True)
-        # Return the best result
-        return (all_results[0][1], all_results[0][2])
+        top = await run_provider_queries("SearchApi.io", script_queries(game_name), fetch_query, SEARCHAPI_CONCURRENCY, TopK(limit))
+        return top.ranked()
     except Exception:
-        return None
+        return []
 
 # Apply similar smart logic to other sources
-async def search_youtube_script_serpapi(game_name, search_words=None):
+@cached_provider("serpapi")
+async def search_youtube_script_serpapi(game_name, search_words=None, limit=1):
     if not SERPAPI_KEY:
-        return None
-    url = "https://serpapi.com/search.json"
-    queries = [
-        f"{game_name} script",
-        f"script for {game_name}",
-        f"{game_name} hack script",
-        f"{game_name} exploit",
-        f"{game_name} pastebin",
-        f"{game_name} working script",
-        f"{game_name} gui",
-        f"{game_name} auto farm",
-        f"{game_name} loadstring",
-        f"{game_name} op script",
-        f"{game_name} injector",
-        f"{game_name} undetected script",
-        f"{game_name} no key script",
-        f"{game_name} 2024 script",
-        f"{game_name} latest script"
-    ]
-    all_results = []
+        return []
+    url = SERPAPI_URL
+
+    async def fetch_query(session, q):
+        params = {
+            "engine": "youtube",
+            "search_query": q,
+            "api_key": SERPAPI_KEY
+        }
+        async with session.get(url, params=params) as resp:
+            check_status(resp)
+            data = await resp.json()
+            videos = data.get("video_results") or data.get("videos") or []
+            batch = []
+            for v in videos[:15]:
+                title = v.get("title", "").lower()
+                desc = v.get("description", "").lower() if v.get("description") else ""
+                tags = ''
+                published = v.get("published", "")
+                if "script" not in title and "script" not in desc:
+                    continue
+                batch.append(((title, desc, tags, published), v))
+        scores = score_videos([fields for fields, _ in batch], search_words or [])
+        return [VideoCandidate(score, v.get("title"), v.get("link"), "serpapi") for score, (_, v) in zip(scores, batch)]
+
     try:
-        async with aiohttp.ClientSession() as session:
-            for q in queries:
-                params = {
-                    "engine": "youtube",
-                    "search_query": q,
-                    "api_key": SERPAPI_KEY
-                }
-                async with session.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        continue
-                    data = await resp.json()
-                    videos = data.get("video_results") or data.get("videos") or []
-                    for v in videos[:15]:
-                        title = v.get("title", "").lower()
-                        desc = v.get("description", "").lower() if v.get("description") else ""
-                        tags = ''
-                        published = v.get("published", "")
-                        if "script" not in title and "script" not in desc:
-                            continue
-                        score = smart_video_score(title, desc, tags, search_words or [], published)
-                        all_results.append((score, v.get("title"), v.get("link")))
-        if not all_results:
-            return None
-        all_results.sort(reverse=True)
-        return (all_results[0][1], all_results[0][2])
+        top = await run_provider_queries("SerpApi", script_queries(game_name), fetch_query, SERPAPI_CONCURRENCY, TopK(limit))
+        return top.ranked()
     except Exception:
-        return None
+        return []
 
-async def search_youtube_script_camideo(game_name, search_words=None):
+@cached_provider("camideo")
+async def search_youtube_script_camideo(game_name, search_words=None, limit=1):
     if not CAMIDEO_KEY:
-        return None
-    url = "http://api.camideo.com/"
-    queries = [
-        f"{game_name} script",
-        f"script for {game_name}",
-        f"{game_name} hack script",
-        f"{game_name} exploit",
-        f"{game_name} pastebin",
-        f"{game_name} working script",
-        f"{game_name} gui",
-        f"{game_name} auto farm",
-        f"{game_name} loadstring",
-        f"{game_name} op script",
-        f"{game_name} injector",
-        f"{game_name} undetected script",
-        f"{game_name} no key script",
-        f"{game_name} 2024 script",
-        f"{game_name} latest script"
-    ]
-    all_results = []
+        return []
+    url = CAMIDEO_URL
+
+    async def fetch_query(session, q):
+        params = {
+            "key": CAMIDEO_KEY,
+            "q": q,
+            "source": "youtube",
+            "page": 1,
+            "response": "json"
+        }
+        async with session.get(url, params=params) as resp:
+            check_status(resp)
+            data = await resp.json()
+            videos = data.get("Camideo", {}).get("videos", [])
+            batch = []
+            for v in videos[:15]:
+                title = v.get("title", "").lower()
+                desc = v.get("description", "").lower() if v.get("description") else ""
+                tags = ''
+                published = v.get("published", "")
+                if "script" not in title and "script" not in desc:
+                    continue
+                batch.append(((title, desc, tags, published), v))
+        scores = score_videos([fields for fields, _ in batch], search_words or [])
+        return [VideoCandidate(score, v.get("title"), v.get("link"), "camideo") for score, (_, v) in zip(scores, batch)]
+
     try:
-        async with aiohttp.ClientSession() as session:
-            for q in queries:
-                params = {
-                    "key": CAMIDEO_KEY,
-                    "q": q,
-                    "source": "youtube",
-                    "page": 1,
-                    "response": "json"
-                }
-                async with session.get(url, params=params) as resp:
-                    if resp.status != 200:
-                        continue
-                    data = await resp.json()
-                    videos = data.get("Camideo", {}).get("videos", [])
-                    for v in videos[:15]:
-                        title = v.get("title", "").lower()
-                        desc = v.get("description", "").lower() if v.get("description") else ""
-                        tags = ''
-                        published = v.get("published", "")
-                        if "script" not in title and "script" not in desc:
-                            continue
-                        score = smart_video_score(title, desc, tags, search_words or [], published)
-                        all_results.append((score, v.get("title"), v.get("link")))
-        if not all_results:
-            return None
-        all_results.sort(reverse=True)
-        return (all_results[0][1], all_results[0][2])
+        top = await run_provider_queries("Camideo", script_queries(game_name), fetch_query, CAMIDEO_CONCURRENCY, TopK(limit))
+        return top.ranked()
     except Exception:
+        return []
+
+async def fetch_results_page(session, source, url, headers=None):
+    """
+    GET a search results page behind the source's circuit breaker and rate
+    limiter. Returns the HTML, or None when skipped or failed; a 429 pauses
+    the source's limiter rather than counting against its breaker, while
+    error statuses, connection errors and timeouts count as failures. A
+    None also marks the provider pass incomplete.
+    """
+    breaker = get_breaker(source)
+    if not breaker.allow():
+        mark_pass_incomplete()
         return None
+    limiter = get_rate_limiter(source)
+    if limiter is not None:
+        await limiter.acquire()
+    try:
+        with upstream_source(source):
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 429 and limiter is not None:
+                    limiter.pause(retry_after_seconds(resp) or RATE_LIMIT_DEFAULT_PAUSE)
+                    mark_pass_incomplete()
+                    return None
+                if resp.status != 200:
+                    breaker.record_failure()
+                    mark_pass_incomplete()
+                    return None
+                html = await resp.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Unreachable counts as failed, so a dead source gets skipped
+        print(f"[{source}] Request failed: {e}")
+        breaker.record_failure()
+        mark_pass_incomplete()
+        return None
+    breaker.record_success()
+    return html
 
-async def search_youtube_script_duckduckgo(game_name, search_words=None):
+@cached_provider("duckduckgo")
+async def search_youtube_script_duckduckgo(game_name, search_words=None, limit=1):
     queries = [
         f"{game_name} script youtube video",
         f"script for {game_name} youtube video",
@@ -420,36 +2187,113 @@ async def search_youtube_script_duckduckgo(game_name, search_words=None):
         f"{game_name} pastebin youtube video",
         f"{game_name} working script youtube video"
     ]
-    all_results = []
+    top = TopK(limit)
     try:
-        async with aiohttp.ClientSession() as session:
-            for q in queries:
-                url = "https://duckduckgo.com/?q=" + q.replace(" ", "+")
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        continue
-                    html = await resp.text()
-                    soup = BeautifulSoup(html, "html.parser")
-                    for a in soup.find_all("a", href=True):
-                        href = a["href"]
-                        if "youtube.com/watch" in href:
-                            text = a.get_text(strip=True).lower()
-                            if "script" not in text:
-                                continue
-                            score = smart_video_score(text, '', '', search_words or [])
-                            all_results.append((score, a.get_text(strip=True) or href, href))
-        if not all_results:
-            return None
-        all_results.sort(reverse=True)
-        return (all_results[0][1], all_results[0][2])
-    except Exception:
-        return None
+        session = get_http_session()
+        for q in queries:
+            url = f"{DUCKDUCKGO_URL}?q=" + q.replace(" ", "+")
+            html = await fetch_results_page(session, "DuckDuckGo", url)
+            if html is None:
+                continue
+            top.extend(await asyncio.to_thread(scored_links, html, VIDEO_LINK_PATTERNS, search_words, "duckduckgo"))
+    except Exception as e:
+        # Keep whatever the earlier queries found
+        print(f"[DuckDuckGo] Search failed: {e}")
+        mark_pass_incomplete()
+    return top.ranked()
+
+youtube_quota = get_quota("YouTube API")
+YOUTUBE_SEARCH_COST = 100
+YOUTUBE_VIDEOS_COST = 1
+
+async def check_youtube_status(resp):
+    # A 403 quotaExceeded means today's quota is gone even if our count disagrees
+    if resp.status == 403:
+        try:
+            reasons = [e.get("reason") for e in (await resp.json()).get("error", {}).get("errors", [])]
+        except Exception:
+            reasons = []
+        if "quotaExceeded" in reasons or "dailyLimitExceeded" in reasons:
+            youtube_quota.exhaust()
+    check_status(resp)
 
-async def search_youtube_script_youtube_api(game_name, search_words=None):
-    # Placeholder: You can implement YouTube Data API logic here if you want
-    return None
+async def fetch_youtube_video_details(session, video_ids):
+    # videos.list for up to 50 IDs per call: full descriptions, tags, publish dates
+    videos = []
+    limiter = get_rate_limiter("YouTube API")
+    for i in range(0, len(video_ids), 50):
+        await limiter.acquire()
+        if not youtube_quota.try_spend(YOUTUBE_VIDEOS_COST):
+            print("[YouTube API] Daily quota exhausted, skipping videos.list")
+            mark_pass_incomplete()
+            break
+        count_api_units(YOUTUBE_VIDEOS_COST)
+        params = {
+            "part": "snippet",
+            "id": ",".join(video_ids[i:i + 50]),
+            "maxResults": 50,
+            "key": YOUTUBE_API_KEY
+        }
+        async with session.get(f"{YOUTUBE_API_BASE}/videos", params=params) as resp:
+            await check_youtube_status(resp)
+            data = await resp.json()
+        videos.extend(data.get("items", []))
+    return videos
+
+@cached_provider("youtube_api")
+async def search_youtube_script_youtube_api(game_name, search_words=None, limit=1):
+    if not YOUTUBE_API_KEY:
+        return []
+
+    async def fetch_query(session, q):
+        # search.list only yields IDs; details come from one batched videos.list
+        params = {
+            "part": "id",
+            "type": "video",
+            "maxResults": YOUTUBE_API_MAX_RESULTS,
+            "q": q,
+            "key": YOUTUBE_API_KEY
+        }
+        async with session.get(f"{YOUTUBE_API_BASE}/search", params=params) as resp:
+            await check_youtube_status(resp)
+            data = await resp.json()
+        return [item["id"]["videoId"] for item in data.get("items", []) if item.get("id", {}).get("videoId")]
+
+    try:
+        queries = script_queries(game_name)[:YOUTUBE_API_QUERIES]
+        found = await run_provider_queries("YouTube API", queries, fetch_query, YOUTUBE_API_CONCURRENCY,
+                                           query_cost=YOUTUBE_SEARCH_COST)
+        video_ids = list(dict.fromkeys(found))  # de-duplicated across queries, order kept
+        if not video_ids:
+            return []
+        # The search.list units are already spent: retry the cheap details
+        # call, and count its failures against the YouTube breaker
+        details, error = await fetch_with_retry(
+            "YouTube API", lambda: fetch_youtube_video_details(get_http_session(), video_ids))
+        if error:
+            print(f"[YouTube API] videos.list: {error}")
+            mark_pass_incomplete()
+            return []
+        batch = []
+        for v in details:
+            snippet = v.get("snippet", {})
+            title = snippet.get("title", "").lower()
+            desc = snippet.get("description", "").lower()
+            tags = ' '.join(snippet.get("tags", [])).lower()
+            published = snippet.get("publishedAt", "")
+            if "script" not in title and "script" not in desc and "script" not in tags:
+                continue
+            batch.append(((title, desc, tags, published), (snippet.get("title"), f"https://www.youtube.com/watch?v={v.get('id')}")))
+        scores = score_videos([fields for fields, _ in batch], search_words or [])
+        top = TopK(limit)
+        top.extend(VideoCandidate(score, title, link, "youtube_api") for score, (_, (title, link)) in zip(scores, batch))
+        return top.ranked()
+    except Exception as e:
+        print(f"[YouTube API] Error: {e}")
+        return []
 
-async def fallback_web_search(game_name, search_words=None):
+@cached_provider("web")
+async def fallback_web_search(game_name, search_words=None, limit=1):
     # Try Google and Reddit for script links/videos
     queries = [
         f'site:youtube.com {game_name} script',
@@ -458,79 +2302,698 @@ async def fallback_web_search(game_name, search_words=None):
         f'{game_name} script roblox',
         f'{game_name} script v3rmillion',
     ]
-    all_results = []
+    top = TopK(limit)
     try:
-        async with aiohttp.ClientSession() as session:
-            for q in queries:
-                # Google search
-                google_url = f'https://www.google.com/search?q={q.replace(" ", "+")}'
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                async with session.get(google_url, headers=headers) as resp:
-                    if resp.status != 200:
-                        continue
-                    html = await resp.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    for a in soup.find_all('a', href=True):
-                        href = a['href']
-                        if 'youtube.com/watch' in href or 'pastebin.com/' in href:
-                            text = a.get_text(strip=True).lower()
-                            if 'script' not in text:
-                                continue
-                            score = smart_video_score(text, '', '', search_words or [])
-                            all_results.append((score, a.get_text(strip=True) or href, href))
-                # Reddit search
-                reddit_url = f'https://www.reddit.com/search/?q={q.replace(" ", "+")}'
-                async with session.get(reddit_url, headers=headers) as resp:
-                    if resp.status != 200:
-                        continue
-                    html = await resp.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    for a in soup.find_all('a', href=True):
-                        href = a['href']
-                        if 'youtube.com/watch' in href or 'pastebin.com/' in href:
-                            text = a.get_text(strip=True).lower()
-                            if 'script' not in text:
-                                continue
-                            score = smart_video_score(text, '', '', search_words or [])
-                            all_results.append((score, a.get_text(strip=True) or href, href))
-        if not all_results:
+        session = get_http_session()
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        for q in queries:
+            # Google search, then Reddit search
+            google_url = f'{GOOGLE_SEARCH_URL}?q={q.replace(" ", "+")}'
+            html = await fetch_results_page(session, "Google", google_url, headers)
+            if html is not None:
+                top.extend(await asyncio.to_thread(scored_links, html, SCRIPT_LINK_PATTERNS, search_words, "google"))
+            reddit_url = f'{REDDIT_SEARCH_URL}?q={q.replace(" ", "+")}'
+            html = await fetch_results_page(session, "Reddit", reddit_url, headers)
+            if html is not None:
+                top.extend(await asyncio.to_thread(scored_links, html, SCRIPT_LINK_PATTERNS, search_words, "reddit"))
+    except Exception as e:
+        # Keep whatever the earlier queries found
+        print(f"[Fallback] Search failed: {e}")
+        mark_pass_incomplete()
+    return top.ranked()
+
+# (label, provider, is_configured) in default priority order; a provider
+# whose daily quota is spent counts as unconfigured until the next day
+VIDEO_PROVIDERS = [
+    ("youtube_api", search_youtube_script_youtube_api,
+     lambda: YOUTUBE_API_KEY and provider_available("YouTube API", YOUTUBE_SEARCH_COST)),
+    ("searchapi", search_youtube_script_searchapi, lambda: SEARCHAPI_IO_KEY and provider_available("SearchApi.io")),
+    ("serpapi", search_youtube_script_serpapi, lambda: SERPAPI_KEY and provider_available("SerpApi")),
+    ("camideo", search_youtube_script_camideo, lambda: CAMIDEO_KEY and provider_available("Camideo")),
+    ("duckduckgo", search_youtube_script_duckduckgo, lambda: True)
+]
+
+class ProviderStats:
+    # Rolling latency and success history for one provider
+    MIN_SAMPLES = 5
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record(self, latency, ok):
+        self.latencies.append(latency)
+        self.outcomes.append(ok)
+
+    def quantile(self, q):
+        if len(self.latencies) < self.MIN_SAMPLES:
             return None
-        all_results.sort(reverse=True)
-        return (all_results[0][1], all_results[0][2])
-    except Exception:
-        return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
 
-async def search_youtube_script_all(game_name, max_videos):
+    def success_rate(self):
+        # Smoothed so one early failure doesn't bury a provider
+        return (sum(self.outcomes) + 1) / (len(self.outcomes) + 2)
+
+    def utility(self):
+        p50 = self.quantile(0.5) or PROVIDER_HEDGE_AFTER
+        return self.success_rate() / max(p50, 0.05)
+
+class ProviderScheduler:
+    """
+    Races video providers: the best ones by observed success rate and latency
+    start first, a provider running past its p90 latency triggers a hedge (the
+    next-best provider starts alongside it), and the race stops, cancelling
+    whatever is still running, once enough good results are in.
+    """
+    def __init__(self, width, threshold, window):
+        self.width = width
+        self.threshold = threshold
+        self.window = window
+        self.stats = {}
+
+    def stats_for(self, label):
+        stats = self.stats.get(label)
+        if stats is None:
+            stats = self.stats[label] = ProviderStats(self.window)
+        return stats
+
+    def order(self, providers):
+        # Stable sort: untried providers keep their default priority
+        return sorted(providers, key=lambda p: self.stats_for(p[0]).utility(), reverse=True)
+
+    def hedge_delay(self, label):
+        return self.stats_for(label).quantile(0.9) or PROVIDER_HEDGE_AFTER
+
+    async def _timed(self, label, func, args):
+        # Runs in its own task, so the cache_served flag is this call's alone
+        served = {"hit": False}
+        cache_served.set(served)
+        start = time.monotonic()
+        try:
+            results = await func(*args)
+        except Exception as e:
+            print(f"[{label}] Provider failed: {e}")
+            results = []
+        elapsed = time.monotonic() - start
+        if served["hit"]:
+            # Cache hits say nothing about the upstream's latency or health
+            provider_seconds.observe(elapsed, label, "cached")
+            trace_event(f"provider {label}", f"{len(results)} result(s) from cache")
+            return results
+        self.stats_for(label).record(elapsed, bool(results))
+        provider_seconds.observe(elapsed, label, "ok" if results else "empty")
+        trace_event(f"provider {label}", f"{len(results)} result(s) in {elapsed:.2f}s")
+        return results
+
+    async def race_stream(self, providers, args, max_results):
+        """
+        Races providers in order, hedging slow ones. Yields the current top
+        max_results VideoCandidates (one per video, best first) each time a
+        finished provider improves them, and always ends with the final list
+        (which may repeat the previous one).
+        """
+        loop = asyncio.get_running_loop()
+        queue = deque(self.order(providers))
+        running = {}  # task -> (label, hedge_at or None once hedged)
+        best = TopK(max_results)  # across providers, one per video
+
+        def launch():
+            label, func = queue.popleft()
+            task = asyncio.create_task(self._timed(label, func, args))
+            running[task] = (label, loop.time() + self.hedge_delay(label))
+
+        def enough():
+            return best.full_above(self.threshold)
+
+        try:
+            while queue and len(running) < self.width:
+                launch()
+            while running and not enough():
+                hedge_times = [h for _, h in running.values() if h is not None]
+                timeout = max(0, min(hedge_times) - loop.time()) if hedge_times and queue else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Hedge the slowest-to-answer provider with the next best one
+                    now = loop.time()
+                    for task, (label, hedge_at) in running.items():
+                        if hedge_at is not None and hedge_at <= now:
+                            running[task] = (label, None)
+                            print(f"[{label}] Past p90 latency, hedging with {queue[0][0]}")
+                            break
+                    launch()
+                    continue
+                improved = False
+                for task in done:
+                    running.pop(task)
+                    for candidate in task.result():
+                        improved = best.push(candidate) or improved
+                # Keep the race at full width while results are still missing
+                while queue and len(running) < self.width and not enough():
+                    launch()
+                if improved and running:
+                    yield best.ranked()
+        finally:
+            for task in running:
+                task.cancel()
+        yield best.ranked()
+
+    def snapshot(self):
+        # Per-provider success rate and latency, as order() and hedge_delay() see them
+        return {
+            label: {
+                "samples": len(stats.latencies),
+                "success_rate": round(stats.success_rate(), 3),
+                "p50": round(stats.quantile(0.5) or 0, 3) or None,
+                "p90": round(stats.quantile(0.9) or 0, 3) or None,
+            }
+            for label, stats in list(self.stats.items())
+        }
+
+provider_scheduler = ProviderScheduler(PROVIDER_RACE_WIDTH, PROVIDER_SCORE_THRESHOLD, PROVIDER_STATS_WINDOW)
+
+@single_flight_stream(lambda game_name, max_videos: (normalize_query(game_name), max_videos), snapshots=True)
+async def stream_youtube_scripts(game_name, max_videos):
+    """
+    Yields ("candidate", [(title, link)]) whenever a provider improves the
+    best videos found so far, then ("best", [(title, link)]) once the search
+    is over.
+    """
+    if job_queue is not None:
+        async with contextlib.aclosing(stream_remote_youtube_scripts(game_name, max_videos)) as stream:
+            async for event in stream:
+                yield event
+        return
     # Extract search words from game_name (excluding 'script')
     search_words = [w.lower() for w in game_name.replace('script', '').split() if w.strip()]
-    results = []
-    seen_links = set()
+    providers = [(label, func) for label, func, configured in VIDEO_PROVIDERS if configured()]
     all_candidates = []
-    for func in [
-        search_youtube_script_youtube_api,
-        search_youtube_script_searchapi,
-        search_youtube_script_serpapi,
-        search_youtube_script_camideo,
-        search_youtube_script_duckduckgo
-    ]:
-        candidates = []
-        for _ in range(max_videos):
-            result = await func(game_name + ' script', search_words)
-            if result and result[1] not in seen_links:
-                candidates.append(result)
-                seen_links.add(result[1])
-        all_candidates.extend(candidates)
+    race = provider_scheduler.race_stream(providers, (game_name + ' script', search_words, max_videos), max_videos)
+    async with contextlib.aclosing(race) as stream:
+        async for results in stream:
+            candidates = [(c.title, c.link) for c in results]
+            if candidates and candidates != all_candidates:
+                yield "candidate", candidates
+            all_candidates = candidates
     # If no results, try fallback web search
     if not all_candidates:
-        fallback = await fallback_web_search(game_name, search_words)
-        if fallback:
-            all_candidates.append(fallback)
-    return all_candidates[:max_videos]
+        for c in await fallback_web_search(game_name, search_words, max_videos):
+            all_candidates.append((c.title, c.link))
+    yield "best", all_candidates[:max_videos]
+
+async def search_youtube_script_all(game_name, max_videos):
+    best = []
+    async with contextlib.aclosing(stream_youtube_scripts(game_name, max_videos)) as stream:
+        async for kind, best in stream:
+            pass
+    return best
+
+def game_search_slots():
+    # With search workers the limit is what the workers can take between them
+    if job_queue is not None:
+        return max(1, SEARCH_WORKERS) * WORKER_CONCURRENCY
+    return GAME_SEARCH_CONCURRENCY
+
+async def stream_script_search(search, max_games, max_videos):
+    """
+    The findscripts pipeline as one stream of events. Each game's video
+    search starts as soon as the game is discovered, so early games can have
+    videos before the slower game sources have answered.
+
+      ("games", source, [(idx, name, players, game_id)])  newly found games
+      ("games_done", error, sources)                      no more games
+      ("candidate", idx, [(title, link)])                 best videos so far
+      ("best", idx, [(title, link)])                      final videos
+
+    Every game gets exactly one "best"; the stream ends after the last one.
+    """
+    queue = asyncio.Queue()
+    searches = []
+
+    async def search_game(idx, name):
+        results = []
+        try:
+            async with get_shared_semaphore("findscripts", game_search_slots()):
+                videos = stream_youtube_scripts(f"{name} {search} script", max_videos)
+                async with contextlib.aclosing(videos) as stream:
+                    async for kind, results in stream:
+                        if kind == "candidate":
+                            queue.put_nowait(("candidate", idx, results))
+        except Exception as e:
+            print(f"[findscripts] Video search failed for {name}: {e}")
+        trace_event("videos", f"{name}: {len(results)} video(s)")
+        queue.put_nowait(("best", idx, results))
+
+    async def discover():
+        found = 0
+        try:
+            async with contextlib.aclosing(stream_roblox_games(search, max_games)) as stream:
+                async for event in stream:
+                    if event[0] != "games":
+                        queue.put_nowait(event)
+                        return
+                    batch = [(found + i, name, players, game_id) for i, (name, players, game_id) in enumerate(event[2])]
+                    found += len(batch)
+                    queue.put_nowait(("games", event[1], batch))
+                    for idx, name, _, _ in batch:
+                        searches.append(asyncio.create_task(search_game(idx, name)))
+        except Exception as e:
+            print(f"[findscripts] Game discovery failed: {e}")
+            queue.put_nowait(("games_done", None if found else str(e), []))
+
+    discovery = asyncio.create_task(discover())
+    games_done = False
+    unfinished = 0
+    try:
+        while not games_done or unfinished:
+            event = await queue.get()
+            if event[0] == "games":
+                unfinished += len(event[2])
+            elif event[0] == "games_done":
+                games_done = True
+            elif event[0] == "best":
+                unfinished -= 1
+            yield event
+    finally:
+        discovery.cancel()
+        for task in searches:
+            task.cancel()
+
+# --- Search workers ---
+class JobQueue:
+    """
+    Video-search jobs in a local SQLite file shared by the bot and its search
+    workers. A worker claims a job, reports the best videos so far as
+    progress and the final videos as its result; the bot polls the row and
+    deletes it when done. Running jobs whose worker stopped heartbeating for
+    `timeout` seconds go back to the queue; jobs queued that long are
+    dropped, as the bot has given up on them. Methods block; call them from
+    a thread.
+    """
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            # Autocommit; claim() takes the write lock explicitly
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, game_name TEXT NOT NULL, max_videos INTEGER NOT NULL, "
+                "guild TEXT, status TEXT NOT NULL, worker TEXT, progress TEXT, result TEXT, "
+                "api_units INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS search_jobs_status ON search_jobs (status, id)")
+            self._conn = conn
+        return self._conn
+
+    def submit(self, game_name, max_videos, guild):
+        with self._lock:
+            now = time.time()
+            cursor = self._connect().execute(
+                "INSERT INTO search_jobs (game_name, max_videos, guild, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (game_name, max_videos, guild, now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker):
+        # Oldest queued job as (id, game_name, max_videos, guild), or None
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # The bot stops waiting for a job queued this long, so nobody
+                # would read its result
+                conn.execute(
+                    "DELETE FROM search_jobs WHERE status = 'queued' AND updated_at < ?",
+                    (now - self.timeout,)
+                )
+                conn.execute(
+                    "UPDATE search_jobs SET status = 'queued', worker = NULL, updated_at = ? "
+                    "WHERE status = 'running' AND updated_at < ?",
+                    (now, now - self.timeout)
+                )
+                row = conn.execute(
+                    "SELECT id, game_name, max_videos, guild FROM search_jobs "
+                    "WHERE status = 'queued' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE search_jobs SET status = 'running', worker = ?, updated_at = ? WHERE id = ?",
+                        (worker, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return row
+
+    def _update(self, job_id, worker, assignments, values):
+        # False once the job isn't this worker's any more (given up, reassigned)
+        with self._lock:
+            cursor = self._connect().execute(
+                f"UPDATE search_jobs SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (*values, time.time(), job_id, worker)
+            )
+            return cursor.rowcount > 0
+
+    def report(self, job_id, worker, progress):
+        return self._update(job_id, worker, "progress = ?", (json.dumps(progress),))
+
+    def finish(self, job_id, worker, result, api_units):
+        return self._update(job_id, worker, "status = 'done', result = ?, api_units = ?", (json.dumps(result), api_units))
+
+    def fail(self, job_id, worker, error):
+        return self._update(job_id, worker, "status = 'failed', error = ?", (error,))
+
+    def heartbeat(self, worker):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE search_jobs SET updated_at = ? WHERE worker = ? AND status = 'running'",
+                (time.time(), worker)
+            )
+
+    def poll(self, job_id):
+        # (status, progress, result, api_units, error, updated_at), or None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT status, progress, result, api_units, error, updated_at FROM search_jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, progress, result, api_units, error, updated_at = row
+        return (status, json.loads(progress) if progress else None, json.loads(result) if result else None,
+                api_units, error, updated_at)
+
+    def remove(self, job_id):
+        with self._lock:
+            self._connect().execute("DELETE FROM search_jobs WHERE id = ?", (job_id,))
+
+    def clear(self):
+        # Every job left by an earlier bot process; their callers are gone
+        with self._lock:
+            return self._connect().execute("DELETE FROM search_jobs").rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Set in the bot process when SEARCH_WORKERS > 0; stream_youtube_scripts then
+# hands its searches to the workers
+job_queue = None
+
+async def stream_remote_youtube_scripts(game_name, max_videos):
+    # stream_youtube_scripts' events, produced by a search worker
+    queue = job_queue
+    job_id = await asyncio.to_thread(queue.submit, game_name, max_videos, current_guild.get())
+    trace_event("job", f"#{job_id} queued: {game_name}")
+    candidates = []
+    try:
+        while True:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            job = await asyncio.to_thread(queue.poll, job_id)
+            if job is None:
+                raise UpstreamError(f"Search job #{job_id} disappeared")
+            status, progress, result, api_units, error, updated_at = job
+            if status == "done":
+                count_api_units(api_units)
+                yield "best", [tuple(video) for video in result]
+                return
+            if status == "failed":
+                raise UpstreamError(f"Search job #{job_id} failed: {error}")
+            if time.time() - updated_at > JOB_TIMEOUT:
+                # Queued that long means no worker is taking jobs
+                raise UpstreamError(f"Search job #{job_id} timed out ({status})")
+            if progress and progress != candidates:
+                candidates = progress
+                yield "candidate", [tuple(video) for video in candidates]
+    finally:
+        await asyncio.to_thread(queue.remove, job_id)
+
+async def run_search_job(queue, worker, job):
+    job_id, game_name, max_videos, guild = job
+    # Task-local: rate limiters share by the guild that asked, and the meter
+    # reports this job's API calls back to the bot (e.g. for the prefetcher)
+    current_guild.set(guild)
+    meter = {"units": 0}
+    api_unit_meter.set(meter)
+    if guild == PREFETCH_GUILD:
+        quota_reserve.set(PREFETCH_QUOTA_RESERVE)
+    best = []
+    try:
+        async with contextlib.aclosing(stream_youtube_scripts(game_name, max_videos)) as stream:
+            async for kind, best in stream:
+                if kind == "candidate" and not await asyncio.to_thread(queue.report, job_id, worker, best):
+                    print(f"[Worker {worker}] Job #{job_id} was given up, stopping")
+                    return
+        await asyncio.to_thread(queue.finish, job_id, worker, best, meter["units"])
+    except Exception as e:
+        print(f"[Worker {worker}] Job #{job_id} failed: {e}")
+        await asyncio.to_thread(queue.fail, job_id, worker, str(e))
+
+async def search_worker(worker):
+    """
+    Claim and run video-search jobs from JOB_QUEUE_PATH, up to
+    WORKER_CONCURRENCY at a time, until cancelled.
+    """
+    queue = JobQueue(JOB_QUEUE_PATH, JOB_TIMEOUT)
+    # Every worker takes an equal share of each provider's rate limit
+    share = max(1, SEARCH_WORKERS)
+    for name, (rate, burst) in RATE_LIMITS.items():
+        RATE_LIMITS[name] = (rate / share, max(1, burst // share))
+    get_http_session()
+    # Know today's usage before spending any, then keep it in sync
+    await asyncio.to_thread(quota_store.save)
+    quota_sync = asyncio.create_task(quota_sync_loop())
+    running = set()
+    heartbeat_at = time.monotonic()
+    print(f"[Worker {worker}] Waiting for jobs in {JOB_QUEUE_PATH}")
+    try:
+        while True:
+            if time.monotonic() - heartbeat_at >= JOB_TIMEOUT / 3:
+                await asyncio.to_thread(queue.heartbeat, worker)
+                heartbeat_at = time.monotonic()
+            job = None
+            if len(running) < WORKER_CONCURRENCY:
+                try:
+                    job = await asyncio.to_thread(queue.claim, worker)
+                except Exception as e:
+                    print(f"[Worker {worker}] Could not claim a job: {e}")
+            if job is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(run_search_job(queue, worker, job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        quota_sync.cancel()
+        for task in running:
+            task.cancel()
+        await close_http_session()
+        result_cache.close()
+        quota_store.save()
+        queue.close()
+
+def run_search_worker(worker):
+    # Entry point of a worker process
+    try:
+        asyncio.run(search_worker(worker))
+    except KeyboardInterrupt:
+        pass
+
+def start_search_workers(count):
+    # Daemon processes, so they exit with the bot
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for i in range(count):
+        process = context.Process(target=run_search_worker, args=(f"{os.getpid()}-{i}",), daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+# --- Background Prefetch ---
+class HourlyBudget:
+    # Sliding one-hour window of spent API quota units
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = deque()  # (timestamp, units)
+
+    def used(self):
+        cutoff = time.monotonic() - 3600
+        while self.spent and self.spent[0][0] < cutoff:
+            self.spent.popleft()
+        return sum(units for _, units in self.spent)
+
+    def record(self, units):
+        if units:
+            self.spent.append((time.monotonic(), units))
+
+PREFETCH_GUILD = "prefetch"
+prefetch_budget = HourlyBudget(PREFETCH_MAX_UNITS_PER_HOUR)
+
+async def prefetch_top_games():
+    """
+    Warm the video result cache for the most-played games. Queries use the
+    same normalized key as findscripts, so searches whose words all appear in
+    the game name are answered from the cache. Stops once the hourly unit
+    budget can't cover another game, and leaves each provider's
+    PREFETCH_QUOTA_RESERVE of the daily quota to commands.
+    """
+    index = game_index
+    if index is not None:
+        games = index.games[:PREFETCH_TOP_GAMES]
+    else:
+        games, _ = await game_list_cache.get("Rolimons", fetch_roblox_games_rolimons)
+        games = sorted(games, key=lambda g: g[1], reverse=True)[:PREFETCH_TOP_GAMES]
+    warmed = 0
+    costliest = 0
+    for name, players, game_id in games:
+        if prefetch_budget.used() + costliest > prefetch_budget.limit:
+            print(f"[Prefetch] Hourly API budget reached after {warmed} games")
+            break
+        meter = {"units": 0}
+        token = api_unit_meter.set(meter)
+        try:
+            # Share the per-game slots with findscripts so users go first
+            async with get_shared_semaphore("findscripts", game_search_slots()):
+                await search_youtube_script_all(f"{name} script", PREFETCH_MAX_VIDEOS)
+        except Exception as e:
+            print(f"[Prefetch] {name} failed: {e}")
+        finally:
+            api_unit_meter.reset(token)
+        prefetch_budget.record(meter["units"])
+        costliest = max(costliest, meter["units"])
+        warmed += 1
+    return warmed
+
+async def prefetch_loop():
+    current_guild.set(PREFETCH_GUILD)  # queues behind users as just another guild
+    quota_reserve.set(PREFETCH_QUOTA_RESERVE)
+    await asyncio.sleep(PREFETCH_INITIAL_DELAY)
+    while True:
+        try:
+            warmed = await prefetch_top_games()
+            print(f"[Prefetch] Warmed {warmed} games, {prefetch_budget.used()} API units in the last hour")
+        except Exception as e:
+            print(f"[Prefetch] Failed: {e}")
+        await asyncio.sleep(PREFETCH_INTERVAL)
+
+# --- Discord Embed Updates ---
+class EmbedUpdater:
+    """
+    Coalesces changes to a message's embed into at most one msg.edit per
+    interval. Change the embed (or use set_field) then call mark_dirty();
+    flush() pushes the final state immediately. Failed intermediate edits
+    are only logged; a failed flush() raises.
+    """
+    def __init__(self, msg, embed, interval_ms=EMBED_FLUSH_INTERVAL_MS):
+        self.msg = msg
+        self.embed = embed
+        self.interval = interval_ms / 1000
+        self._dirty = False
+        self._last_edit = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def set_field(self, idx, value):
+        self.embed.set_field_at(idx, name=self.embed.fields[idx].name, value=value, inline=False)
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        # Keep going while changes arrive during an edit
+        while self._dirty:
+            if self._last_edit is not None:
+                delay = self._last_edit + self.interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                await self._edit()
+            except Exception as e:
+                # Intermediate edits are best effort; flush() reports errors
+                print(f"[EmbedUpdater] Edit failed: {e}")
+
+    async def _edit(self):
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_edit = asyncio.get_running_loop().time()
+            await self.msg.edit(embed=self.embed)
+
+    async def flush(self):
+        # Raises if the final edit fails, so the command can tell the user
+        if self._task is not None:
+            self._task.cancel()
+        self._dirty = True
+        await self._edit()
 
 # --- Hybrid Command for Discord.py ---
+background_tasks = {}
+
+def start_background_task(name, coro_func):
+    # on_ready fires again after reconnects; start each loop only once
+    task = background_tasks.get(name)
+    if task is None or task.done():
+        background_tasks[name] = asyncio.create_task(coro_func())
+
+def command_schema_hash():
+    # Changes whenever a slash command's name, description or options do
+    schema = [command.to_dict(bot.tree) for command in bot.tree.get_commands()]
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands():
+    # tree.sync is a slow, rate-limited API call; skip it while this
+    # application's commands are what was last synced
+    schema_hash = command_schema_hash()
+    key = str(bot.application_id)
+    try:
+        with open(COMMAND_SYNC_STATE_PATH) as f:
+            synced = json.load(f)
+    except (FileNotFoundError, ValueError):
+        synced = {}
+    if not FORCE_COMMAND_SYNC and synced.get(key) == schema_hash:
+        print("[Startup] Command schema unchanged, skipping sync")
+    else:
+        try:
+            await bot.tree.sync()
+        except Exception as e:
+            print(f"[Startup] Command sync failed: {e}")
+            return
+        synced[key] = schema_hash
+        try:
+            with open(COMMAND_SYNC_STATE_PATH, "w") as f:
+                json.dump(synced, f)
+        except Exception as e:
+            print(f"[Startup] Could not write {COMMAND_SYNC_STATE_PATH}: {e}")
+    mark_startup("commands")
+
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    mark_startup("connected")
+    get_http_session()
+    start_background_task("game_index", refresh_game_index_loop)
+    if PREFETCH_TOP_GAMES > 0:
+        start_background_task("prefetch", prefetch_loop)
+    if "command_sync" not in background_tasks:
+        # Once per process, without holding up the other startup work
+        background_tasks["command_sync"] = asyncio.create_task(sync_commands())
     print(f"Logged in as {bot.user}")
 
 @bot.hybrid_command(name="findscripts", description="Find Roblox games and YouTube scripts by search phrase. v2")
@@ -538,11 +3001,24 @@ async def findscripts(ctx, *, search: str, max_games: int = 10, max_videos: int
     """
     Usage: /findscripts <search> [max_games] [max_videos]
     """
+    trace = CommandTrace("findscripts", {"search": search, "max_games": max_games, "max_videos": max_videos})
+    command_traces.append(trace)
+    token = current_trace.set(trace)
+    # Rate limiters take turns between guilds (DMs queue per user)
+    guild = getattr(ctx, "guild", None)
+    author = getattr(ctx, "author", None)
+    guild_token = current_guild.set(f"guild:{guild.id}" if guild else f"user:{getattr(author, 'id', None)}")
+    commands_in_flight.inc("findscripts")
+    start = time.monotonic()
+    outcome = "error"
     try:
         if not search:
             await ctx.send("❌ You must provide a search phrase. Example: /findscripts Grow a garden", ephemeral=True)
+            outcome = "invalid"
             return
         apis = []
+        if YOUTUBE_API_KEY:
+            apis.append("YouTube Data API")
         if SEARCHAPI_IO_KEY:
             apis.append("SearchApi.io")
         if SERPAPI_KEY:
@@ -557,46 +3033,92 @@ async def findscripts(ctx, *, search: str, max_games: int = 10, max_videos: int
             color=0x00ff99
         )
         msg = await ctx.send(embed=embed)
-        games, error, sources = await fetch_popular_roblox_games_smart(search, max_games)
-        if not games:
-            embed.title = "❌ Failed to fetch Roblox games"
-            embed.description = f"{error or 'Unknown error.'}"
-            await msg.edit(embed=embed)
-            return
-        embed.title = f"🎮 Roblox Games Matching: {search}"
-        embed.description = f"**Game sources:** {', '.join(sources)}\n**Search APIs:** {api_list}\n**Max games:** {max_games}\n**Max videos per game:** {max_videos}"
-        embed.clear_fields()
-        for idx, (name, players, game_id) in enumerate(games):
-            game_url = f"https://www.roblox.com/games/{game_id}"
-            field_name = f"{idx+1}. [{name}]({game_url}) ({players} players)"
-            embed.add_field(name=field_name, value="Searching...", inline=False)
-        await msg.edit(embed=embed)
-        for idx, (name, players, game_id) in enumerate(games):
-            embed.set_field_at(idx, name=embed.fields[idx].name, value="Searching...", inline=False)
-            await msg.edit(embed=embed)
-            results = await search_youtube_script_all(f"{name} {search} script", max_videos)
-            if results:
-                value = "\n".join([f"▶️ [{title}]({url})" for title, url in results])
-                embed.set_field_at(idx, name=embed.fields[idx].name, value=value, inline=False)
-            else:
-                embed.set_field_at(idx, name=embed.fields[idx].name, value="⚠️ No script video found.", inline=False)
-            await msg.edit(embed=embed)
-            await asyncio.sleep(0.5)
-        embed.description = f"**Game sources:** {', '.join(sources)}\n**Search APIs:** {api_list}\n**Max games:** {max_games}\n**Max videos per game:** {max_videos}\n\nDone!"
-        await msg.edit(embed=embed)
+        updater = EmbedUpdater(msg, embed)
+        sources = []
+        videos_found = False
+
+        def describe(status=""):
+            embed.description = f"**Game sources:** {', '.join(sources)}\n**Search APIs:** {api_list}\n**Max games:** {max_games}\n**Max videos per game:** {max_videos}{status}"
+
+        def render_videos(results):
+            return "\n".join([f"▶️ [{title}]({url})" for title, url in results])
+
+        # Render each event as it arrives: games appear as their source
+        # answers, and each game's field shows its best videos so far
+        async with contextlib.aclosing(stream_script_search(search, max_games, max_videos)) as stream:
+            async for event in stream:
+                kind = event[0]
+                if kind == "games":
+                    _, source, batch = event
+                    if not embed.fields:
+                        embed.title = f"🎮 Roblox Games Matching: {search}"
+                    if source != "index":
+                        sources.append(source)
+                    for idx, name, players, game_id in batch:
+                        game_url = f"https://www.roblox.com/games/{game_id}"
+                        field_name = f"{idx+1}. [{name}]({game_url}) ({players} players)"
+                        embed.add_field(name=field_name, value="Searching...", inline=False)
+                    describe()
+                    updater.mark_dirty()
+                elif kind == "games_done":
+                    _, error, all_sources = event
+                    command_seconds.observe(time.monotonic() - start, "findscripts", "games")
+                    trace_event("games", f"{len(embed.fields)} game(s) from {', '.join(all_sources) or 'no sources'}")
+                    if not embed.fields:
+                        embed.title = "❌ Failed to fetch Roblox games"
+                        embed.description = f"{error or 'Unknown error.'}"
+                        await updater.flush()
+                        outcome = "no_games"
+                        return
+                    sources = list(all_sources)
+                    describe()
+                    updater.mark_dirty()
+                else:
+                    _, idx, results = event
+                    if results and not videos_found:
+                        videos_found = True
+                        command_seconds.observe(time.monotonic() - start, "findscripts", "first_video")
+                    if kind == "candidate":
+                        updater.set_field(idx, render_videos(results) + "\n_Still searching..._")
+                    else:
+                        updater.set_field(idx, render_videos(results) if results else "⚠️ No script video found.")
+        describe("\n\nDone!")
+        await updater.flush()
+        outcome = "ok"
     except Exception as e:
         await ctx.send(f"❌ An error occurred: {e}", ephemeral=True)
         import traceback
         print(traceback.format_exc())
+    finally:
+        commands_in_flight.dec("findscripts")
+        command_seconds.observe(time.monotonic() - start, "findscripts", "total")
+        commands_total.inc("findscripts", outcome)
+        trace.finish(outcome)
+        current_trace.reset(token)
+        current_guild.reset(guild_token)
 
 # Run bot and web server
 
 def run_flask():
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
+    create_app().run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
 
 if __name__ == "__main__":
-    if not DISCORD_TOKEN:
+    mark_startup("imports")
+    if "--workers" in sys.argv:
+        # Search workers only, for SEARCH_WORKERS_EXTERNAL
+        for process in start_search_workers(max(1, SEARCH_WORKERS)):
+            process.join()
+    elif not DISCORD_TOKEN:
         print("❌ DISCORD_TOKEN is missing.")
     else:
+        if SEARCH_WORKERS > 0:
+            if RESULT_CACHE_BACKEND == "memory":
+                print("⚠️ RESULT_CACHE_BACKEND=memory isn't shared with search workers.")
+            job_queue = JobQueue(JOB_QUEUE_PATH, JOB_TIMEOUT)
+            dropped = job_queue.clear()
+            if dropped:
+                print(f"[Startup] Dropped {dropped} search job(s) left from the last run")
+            if not SEARCH_WORKERS_EXTERNAL:
+                start_search_workers(SEARCH_WORKERS)
         threading.Thread(target=run_flask).start()
         bot.run(DISCORD_TOKEN)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from fake_upstream import FakeUpstream
+
+API_KEY = "test"
+
+
+class YouTubeApiQuotaTest(unittest.IsolatedAsyncioTestCase):
+    # search_youtube_script_youtube_api against fake_upstream's YouTube routes
+
+    async def start_upstream(self, daily_quota):
+        self.upstream = FakeUpstream(daily_quota=daily_quota)
+        base = await self.upstream.start()
+        self.addAsyncCleanup(self.upstream.stop)
+        settings = self.upstream.settings(base)
+        patcher = mock.patch.multiple(
+            main, YOUTUBE_API_KEY=API_KEY, YOUTUBE_API_BASE=settings["YOUTUBE_API_BASE"], RETRY_BASE_DELAY=0,
+            result_cache=main.ResultCache(main.MemoryCacheBackend(main.RESULT_CACHE_TTL, 100)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncSetUp(self):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        for name, saved in (("path", main.quota_store.path), ("state", main.quota_store.state),
+                            ("pending", main.quota_store.pending)):
+            self.addCleanup(setattr, main.quota_store, name, saved)
+        main.quota_store.path = os.path.join(state_dir.name, "quota.json")
+        main.quota_store.state = {}
+        main.quota_store.pending = {}
+        for patcher in (mock.patch.dict(main.circuit_breakers, clear=True),
+                        mock.patch.dict(main.rate_limiters, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addAsyncCleanup(main.close_http_session)
+
+    async def test_search_charges_search_and_videos_units(self):
+        await self.start_upstream(daily_quota=10000)
+        results = await main.search_youtube_script_youtube_api("Blox Fruits", ["blox", "fruits"], 5)
+
+        self.assertTrue(results)
+        queries = len(main.script_queries("Blox Fruits")[:main.YOUTUBE_API_QUERIES])
+        expected = main.YOUTUBE_SEARCH_COST * queries + main.YOUTUBE_VIDEOS_COST
+        self.assertEqual(self.upstream.requests["youtube.search"], queries)
+        self.assertEqual(self.upstream.requests["youtube.videos"], 1)
+        self.assertEqual(self.upstream.quota_used[API_KEY], expected)
+        self.assertEqual(main.youtube_quota.used, expected)
+
+    async def test_quota_exceeded_on_videos_exhausts_quota(self):
+        # Enough upstream quota for the searches but not for videos.list
+        queries = len(main.script_queries("Blox Fruits")[:main.YOUTUBE_API_QUERIES])
+        await self.start_upstream(daily_quota=main.YOUTUBE_SEARCH_COST * queries)
+        results = await main.search_youtube_script_youtube_api("Blox Fruits", ["blox", "fruits"], 5)
+
+        self.assertEqual(results, [])
+        self.assertLessEqual(main.youtube_quota.remaining(), 0)
+        self.assertEqual(main.get_breaker("YouTube API").total_failures, 1)
+        # Nothing cached, so the next search after the reset goes upstream
+        self.assertIsNone(await main.result_cache.get("youtube_api", main.normalize_query("Blox Fruits"), 5))
+
+
+if __name__ == "__main__":
+    unittest.main()